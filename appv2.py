@@ -3,35 +3,37 @@ import time
 import yaml
 import pandas as pd
 import altair as alt
-import importlib
-import src.simulation2
-import os
-
-# --- FORCE RELOAD OF CODE ---
-# This ensures we get the latest Simulation & DriftDetector classes
-importlib.reload(src.simulation2) 
+from streamlit.runtime import get_instance
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from src.config import configure_logging, load_settings
 from src.simulation2 import Market
+from src.runner import SimulationRunner
+from src.store import clear_transactions
 
 # --- CONFIG ---
 st.set_page_config(page_title="Dynamic Price Engine", layout="wide")
+configure_logging()
 
-# Load config
-with open("configs/products.yaml", "r", encoding="utf-8") as file:
-    config = yaml.safe_load(file)
+def new_runner():
+    # Config is read once per Market, not on every rerun
+    with open("configs/products.yaml", "r", encoding="utf-8") as file:
+        config = yaml.safe_load(file)
 
-# --- SESSION STATE ---
-if "market" not in st.session_state:
-    st.session_state.market = Market(config["products"])
+    # Charts render from the Market's in-memory buffer, seeded once from the store
+    market = Market(config["products"])
+    market.load_recent()
 
+    # The Market ticks on its own thread; this script only renders snapshots.
+    # The thread outlives the session, so it stops itself once the tab is gone
+    runtime, session_id = get_instance(), get_script_run_ctx().session_id
+    return SimulationRunner(market, alive=lambda: runtime.is_active_session(session_id))
 
-# If the market object is old (missing the new Observer), we rebuild it.
-if not hasattr(st.session_state.market, 'drift_detector'):
-    st.toast("System Update: Initializing Observer Module...", icon=None)
-    del st.session_state.market
-    st.session_state.market = Market(config["products"])
-    st.rerun()
+# --- SESSION STATE ---
+# (a runner that stopped itself while the session was away is replaced)
+if "runner" not in st.session_state or st.session_state.runner.stopped:
+    st.session_state.runner = new_runner()
 
-market = st.session_state.market
+runner = st.session_state.runner
 
 # --- UI HEADER ---
 st.title("Dynamic Pricing Engine")
@@ -67,20 +69,32 @@ chart_container = st.empty()
 # --- SIDEBAR ---
 st.sidebar.header("Controls")
 run_simulation = st.sidebar.toggle("Start Simulation", value=False)
-sim_speed = st.sidebar.slider("Simulation Speed (s)", 0.1, 2.0, 0.5)
+sim_rate = st.sidebar.slider("Simulation Speed (events/s)", 1, 200, 2)
+refresh = st.sidebar.slider("Dashboard Refresh (s)", 0.2, 5.0, 1.0)
+
+runner.set_rate(sim_rate)
+if run_simulation:
+    runner.resume()
+else:
+    runner.pause()
 
 if st.sidebar.button("Reset System"):
-    # Clear session state and CSV
-    st.session_state.market = Market(config["products"])
-    if os.path.exists("data/transactions.csv"):
-        os.remove("data/transactions.csv")
+    # Clear session state and the transaction store (whichever backend is configured)
+    runner.close()
+    clear_transactions(load_settings()["storage"])
+    st.session_state.runner = new_runner()
     st.rerun()
 
+# Everything below renders from ONE consistent snapshot
+snapshot = runner.snapshot()
+products = snapshot["products"]
+
 # --- HELPER FUNCTIONS ---
 def render_metrics():
-    total_rev = sum(p.revenue for p in market.products)
-    total_sold = sum(p.sold_count for p in market.products)
-    avg_inv = sum(p.inventory for p in market.products) / len(market.products)
+    totals = snapshot["totals"] # computed on the catalog arrays
+    total_rev = totals["revenue"]
+    total_sold = totals["sold"]
+    avg_inv = totals["avg_inventory"]
     
     # Financial Metrics
     metric_rev.metric("Total Revenue", f"€ {total_rev:,.2f}")
@@ -89,7 +103,7 @@ def render_metrics():
 
     # --- NEW: OBSERVER METRIC ---
     # Calculates the rolling accuracy of the last 50 decisions
-    health = market.current_accuracy * 100
+    health = snapshot["accuracy"] * 100
     
     # Logic: Green ("normal") if > 60%, Red ("inverse") if < 60%
     state = "normal" if health > 60 else "inverse"
@@ -105,21 +119,21 @@ def render_metrics():
 def render_shelf():
     with shelf_container.container():
         cols = st.columns(3)
-        for i, p in enumerate(market.products):
+        for i, p in enumerate(products):
             col_idx = i % 3
             with cols[col_idx]:
                 # Text-based inventory status
-                inv_status = "Low Stock" if p.inventory < 20 else "In Stock"
-                inv_color = "inverse" if p.inventory < 20 else "normal"
+                inv_status = "Low Stock" if p["inventory"] < 20 else "In Stock"
+                inv_color = "inverse" if p["inventory"] < 20 else "normal"
                 
                 st.metric(
-                    label=f"{p.name}",
-                    value=f"€ {p.price:.2f}",
-                    delta=f"{p.inventory} units ({inv_status})",
+                    label=f"{p['name']}",
+                    value=f"€ {p['price']:.2f}",
+                    delta=f"{p['inventory']} units ({inv_status})",
                     delta_color=inv_color
                 )
-                st.caption(f"Revenue: € {p.revenue:.2f}")
-                st.progress(min(p.inventory / 100, 1.0))
+                st.caption(f"Revenue: € {p['revenue']:.2f}")
+                st.progress(min(max(p["inventory"], 0) / 100, 1.0))
 
 def render_logs():
     with log_container.container():
@@ -140,7 +154,7 @@ def render_logs():
         """, unsafe_allow_html=True)
         
         log_html = "<div class='log-box'>"
-        for log in market.logs[:30]:
+        for log in snapshot["logs"]:
             color = "#b0b0b0" # Default Grey
             
             # Simple keyword matching for colors
@@ -155,15 +169,14 @@ def render_logs():
         st.markdown(log_html, unsafe_allow_html=True)
 
 def render_charts():
-    # Check if file exists
-    if not os.path.exists(market.csv_path):
-        chart_container.info("Waiting for simulation data... (File not created yet)")
-        return
-
     try:
-        df = pd.read_csv(market.csv_path)
+        # The Market's recent-transactions buffer: no file I/O, constant cost
+        df = snapshot["transactions"]
         
         # Check if data is empty
+        if len(df) == 0:
+            chart_container.info("Waiting for simulation data...")
+            return
         if len(df) < 5: 
             chart_container.info(f"Gathering data... ({len(df)}/5 rows)")
             return
@@ -202,23 +215,17 @@ def render_charts():
         chart_container.error(f"Chart Render Error: {str(e)}")
 
 
-# --- INITIAL RENDER (Run once on load) ---
+# --- RENDER (the simulation itself runs in the background) ---
 render_metrics()
 render_shelf()
 render_logs()
 render_charts() 
+st.sidebar.caption(f"{snapshot['steps']} steps | {snapshot['measured_rate']} events/s")
+with st.sidebar.expander("Simulator stats"):
+    # Per-stage step latency (ms), pricing client counters, drift detector state
+    st.json(snapshot["stats"])
 
-# --- SIMULATION LOOP ---
+# --- POLLING LOOP ---
 if run_simulation:
-    market.simulate_step()
-    
-    render_metrics()
-    render_shelf()
-    render_logs()
-    
-    # Update charts every 5 ticks to avoid UI lag
-    if len(market.logs) % 5 == 0:
-        render_charts()
-        
-    time.sleep(sim_speed)
-    st.rerun()
\ No newline at end of file
+    time.sleep(refresh)
+    st.rerun()
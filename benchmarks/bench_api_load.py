@@ -0,0 +1,167 @@
+"""Closed-loop load test of POST /predict: throughput and p50/p95/p99 per concurrency level.
+
+Each of C client threads sends a request, waits for the answer, sends the
+next one (closed loop), for --duration seconds per level. Targets:
+
+    inprocess   the FastAPI app through Starlette's TestClient (no sockets)
+    uvicorn     a local uvicorn started in the workspace (--workers N)
+    --url       an API that is already running (its own model and settings)
+
+    python -m benchmarks.bench_api_load --target uvicorn --concurrency 1,4,16 > load.json
+"""
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+
+from benchmarks.synthetic import Workspace, latency_summary, load_products
+
+
+def closed_loop(make_client, payloads, concurrency, duration):
+    """Runs `concurrency` threads for `duration` seconds. Returns the level's summary"""
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    start_gate = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def worker(k):
+        post = make_client()
+        i = k
+        start_gate.wait()
+        while time.perf_counter() < deadline[0]:
+            payload = payloads[i % len(payloads)]
+            i += concurrency
+            start = time.perf_counter()
+            try:
+                ok = post("/predict", payload).status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                latencies[k].append(time.perf_counter() - start)
+            else:
+                errors[k] += 1
+
+    threads = [threading.Thread(target=worker, args=(k,), daemon=True) for k in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    started = time.perf_counter()
+    start_gate.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    done = [x for per_thread in latencies for x in per_thread]
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests": len(done),
+        "errors": sum(errors),
+        "throughput_rps": round(len(done) / elapsed, 1),
+        "latency": latency_summary(done)
+    }
+
+
+def make_payloads(n=4096, seed=0):
+    rng = np.random.default_rng(seed)
+    products = load_products()
+    return [
+        {"product_name": p["name"], "base_price": p["base_price"], "inventory_level": int(rng.integers(0, 101))}
+        for p in (products[i] for i in rng.integers(len(products), size=n))
+    ]
+
+
+def http_client(url):
+    def make():
+        # One keep-alive session per thread (like the simulator's client)
+        session = requests.Session()
+        return lambda path, payload: session.post(url + path, json=payload, timeout=30)
+    return make
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_uvicorn(workspace, workers):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workspace.root, env=workspace.env(), stdout=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if requests.get(url + "/", timeout=1).json().get("model_loaded"):
+                return process, url
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("uvicorn did not come up within 60s")
+
+
+def run_levels(make_client, levels, duration, warmup, seed):
+    payloads = make_payloads(seed=seed)
+    closed_loop(make_client, payloads, max(levels), warmup)
+    return [closed_loop(make_client, payloads, c, duration) for c in levels]
+
+
+def run(target="inprocess", levels=(1, 4, 16), duration=5.0, warmup=1.0, workers=1, url=None, workspace=None, seed=0):
+    """inprocess/uvicorn expect to run inside a Workspace (passed in for uvicorn)"""
+    result = {"target": target, "endpoint": "/predict", "duration_s": duration}
+    if url is not None:
+        result.update(url=url, levels=run_levels(http_client(url.rstrip("/")), levels, duration, warmup, seed))
+    elif target == "uvicorn":
+        process, server_url = start_uvicorn(workspace, workers)
+        try:
+            result.update(workers=workers, levels=run_levels(http_client(server_url), levels, duration, warmup, seed))
+        finally:
+            process.terminate()
+            process.wait()
+    else:
+        from fastapi.testclient import TestClient
+        from src.api import app
+
+        with TestClient(app) as client:
+            make_client = lambda: (lambda path, payload: client.post(path, json=payload))
+            result["levels"] = run_levels(make_client, levels, duration, warmup, seed)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--url", default=None, help="load an already running API instead")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma separated levels")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per level")
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--rows", type=int, default=5000, help="synthetic transactions the model is trained on")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    if args.url is not None:
+        result = run(levels=levels, duration=args.duration, warmup=args.warmup, url=args.url, seed=args.seed)
+    else:
+        with Workspace(rows=args.rows, seed=args.seed) as workspace:
+            result = run(args.target, levels, args.duration, args.warmup, args.workers, workspace=workspace,
+                         seed=args.seed)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Micro-benchmark: predict_price and the engine's scoring path, on a synthetic model.
+
+Times the /predict handler itself (no HTTP), and PricingEngine.price /
+price_many per inference backend, with the engine's per-stage histograms
+(feature build, inference, argmax) for each run. Runs in a throwaway
+workspace (see benchmarks/synthetic.py), the decision cache is off.
+
+    python -m benchmarks.bench_engine --runs 2000 > engine.json
+"""
+import argparse
+import copy
+import json
+import time
+import warnings
+
+import numpy as np
+
+from benchmarks.synthetic import Workspace, latency_summary, load_products
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def request_stream(products, runs, seed=0):
+    # The same (product, base price, inventory) sequence for every backend
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(len(products), size=runs)
+    inventories = rng.integers(0, 101, size=runs)
+    return [(products[i]["name"], float(products[i]["base_price"]), int(n)) for i, n in zip(picks, inventories)]
+
+
+def time_calls(fn, args_list, warmup=50):
+    for args in args_list[:warmup]:
+        fn(*args)
+    latencies = np.empty(len(args_list))
+    for i, args in enumerate(args_list):
+        start = time.perf_counter()
+        fn(*args)
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+
+def bench_backend(backend, stream, catalog, batch_runs):
+    from src.config import load_settings
+    from src.engine import PricingEngine
+    from src.metrics import metrics
+
+    settings = copy.deepcopy(load_settings())
+    settings["api"]["inference"]["backend"] = backend
+    engine = PricingEngine(settings=settings)
+    if not engine.load_model():
+        raise RuntimeError("No model in the benchmark registry")
+
+    time_calls(engine.price, stream[:50], warmup=0)
+    metrics.reset("pricing_")  # stage histograms without the warmup
+    single = time_calls(engine.price, stream, warmup=0)
+    stages = metrics.snapshot("pricing_")
+
+    batch = time_calls(lambda items: engine.price_many(items), [(catalog,)] * batch_runs, warmup=5)
+    return {
+        "price": latency_summary(single),
+        "price_per_sec": round(len(single) / single.sum()),
+        "stages": stages,
+        "price_many_catalog": latency_summary(batch)
+    }
+
+
+def bench_handler(stream):
+    # The FastAPI endpoint function, called directly: validation model in, dict out
+    from src import api
+
+    api.engine.load_model()
+    requests = [api.PricingRequest(product_name=n, base_price=b, inventory_level=i) for n, b, i in stream]
+    latencies = time_calls(api.predict_price, [(r,) for r in requests])
+    return {"predict_price": latency_summary(latencies), "requests_per_sec": round(len(latencies) / latencies.sum())}
+
+
+def run(runs=2000, batch_runs=200, seed=0):
+    """Expects to run inside a Workspace"""
+    products = load_products()
+    stream = request_stream(products, runs, seed)
+    catalog = [(p["name"], float(p["base_price"]), 50) for p in products]
+    return {
+        "runs": runs,
+        "handler": bench_handler(stream),
+        "backends": {backend: bench_backend(backend, stream, catalog, batch_runs) for backend in ("flat", "sklearn")}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--batch-runs", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=5000, help="synthetic transactions the model is trained on")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with Workspace(rows=args.rows, seed=args.seed):
+        result = run(args.runs, args.batch_runs, args.seed)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Startup time and memory per API worker: unpickled forest vs memory-mapped FlatForest.
+
+Starts N worker processes per format at the same time. Each one loads the
+latest registry version the way the API does, scores one request (so the
+pages it needs are actually touched) and reports its load time and memory
+from /proc/self/smaps_rollup (Linux):
+
+    rss      resident pages, shared ones included
+    pss      RSS with shared pages split between the processes using them
+    private  pages only this worker holds
+
+    python -m benchmarks.bench_model_load --workers 4
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+WORKER = r"""
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+import sklearn.ensemble  # the API imports it anyway (trainer); keep it out of the load timing
+from src.registry import ModelRegistry
+imported = time.perf_counter()
+bundle = ModelRegistry(sys.argv[2]).load(model_format=sys.argv[1])
+loaded = time.perf_counter()
+
+import numpy as np
+X = np.zeros((20, len(bundle.features)), dtype=np.float32)
+X[:, 0] = np.linspace(1.0, 2.4, 20)
+X[:, 1] = 50
+bundle.model.predict_proba(X)
+
+memory = {}
+try:
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                memory[key] = int(rest.split()[0])
+except OSError:
+    pass
+
+print(json.dumps({
+    "load_s": loaded - imported,
+    "import_s": imported - start,
+    "rss_mb": memory.get("Rss", 0) / 1024,
+    "pss_mb": memory.get("Pss", 0) / 1024,
+    "private_mb": (memory.get("Private_Clean", 0) + memory.get("Private_Dirty", 0)) / 1024,
+}), flush=True)
+sys.stdin.read()  # stay alive until every worker has measured, so pages really are shared
+"""
+
+
+def run_workers(model_format, registry, workers):
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, model_format, registry],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(workers)
+    ]
+    results = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--registry", default="models/registry")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{args.workers} concurrent workers per format, registry {args.registry}\n")
+    print(f"{'format':<8} {'load (ms)':>10} {'rss (MB)':>9} {'pss (MB)':>9} {'private (MB)':>13}")
+    for model_format in ("sklearn", "flat"):
+        results = run_workers(model_format, args.registry, args.workers)
+        mean = {key: np.mean([r[key] for r in results]) for key in results[0]}
+        print(
+            f"{model_format:<8} {mean['load_s'] * 1000:>10.1f} {mean['rss_mb']:>9.1f} "
+            f"{mean['pss_mb']:>9.1f} {mean['private_mb']:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Micro-benchmark: per-request latency of /predict's scoring path.
+
+Compares the old per-request DataFrame assembly against the compiled
+FeatureLayout, both for feature building alone and end-to-end (features +
+predict_proba + argmax), and sklearn's predict_proba against the flattened
+forest (api.inference.backend: flat).
+
+    python -m benchmarks.bench_predict --runs 2000
+"""
+import argparse
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.features import FeatureLayout
+from src.flat_forest import compile_forest
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+PRODUCTS = [("Milk", 1.5), ("Bread", 1.1), ("Eggs", 1.0), ("Cheese", 6.5), ("Meat", 7.67)]
+
+
+def legacy_features(features, product_name, candidates, inventory_level):
+    # The per-request DataFrame assembly that predict_price used to do
+    input_df = pd.DataFrame({
+        'price_offered': candidates,
+        'inventory_level': [inventory_level] * len(candidates)
+    })
+    for feature in features:
+        if feature not in ['price_offered', 'inventory_level']:
+            if feature == f"product_name_{product_name}":
+                input_df[feature] = 1
+            else:
+                input_df[feature] = 0
+    return input_df[features]
+
+
+def compiled_features(layout, product_name, candidates, inventory_level):
+    return layout.build([product_name], candidates[None, :], [inventory_level])
+
+
+def time_calls(fn, runs):
+    # Returns per-call latencies in microseconds
+    rng = np.random.default_rng(0)
+    latencies = np.empty(runs)
+    for i in range(runs):
+        name, base_price = PRODUCTS[i % len(PRODUCTS)]
+        inventory = int(rng.integers(1, 101))
+        start = time.perf_counter()
+        fn(name, base_price, inventory)
+        latencies[i] = (time.perf_counter() - start) * 1e6
+    return latencies
+
+
+def summarize(label, latencies):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{label:<28} p50 {p50:9.1f} us   p99 {p99:9.1f} us")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="Notebook/models/predictor4.pkl")
+    parser.add_argument("--features", default="Notebook/models/model_features.pkl")
+    parser.add_argument("--runs", type=int, default=1000)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    features = joblib.load(args.features)
+    layout = FeatureLayout(features)
+    layout.check_model(model)
+
+    def candidates(base_price):
+        return np.linspace(base_price * 0.7, base_price * 1.6, 20)
+
+    def legacy_build(name, base_price, inventory):
+        return legacy_features(features, name, candidates(base_price), inventory)
+
+    def compiled_build(name, base_price, inventory):
+        return compiled_features(layout, name, candidates(base_price), inventory)
+
+    def end_to_end(build, scorer=model):
+        def run(name, base_price, inventory):
+            c = candidates(base_price)
+            probs = scorer.predict_proba(build(name, base_price, inventory))[:, 1]
+            return np.argmax(c * probs)
+        return run
+
+    fast = compile_forest(model, features)
+    assert fast is not model, "Flat forest failed its self-check against sklearn"
+
+    # Warm up + sanity check: both paths must give the model identical inputs
+    for name, base_price in PRODUCTS:
+        a = model.predict_proba(legacy_build(name, base_price, 42))
+        b = model.predict_proba(compiled_build(name, base_price, 42))
+        assert np.array_equal(a, b), f"Feature builders disagree for {name}"
+
+    print(f"{args.runs} requests, {len(model.estimators_)} trees, {len(features)} features\n")
+    old_build = summarize("features: DataFrame", time_calls(legacy_build, args.runs))
+    new_build = summarize("features: compiled", time_calls(compiled_build, args.runs))
+    old_e2e = summarize("end-to-end: DataFrame", time_calls(end_to_end(legacy_build), args.runs))
+    new_e2e = summarize("end-to-end: compiled", time_calls(end_to_end(compiled_build), args.runs))
+    flat_e2e = summarize("end-to-end: compiled+flat", time_calls(end_to_end(compiled_build, fast), args.runs))
+
+    print(f"\nfeature build speedup (p50): {old_build / new_build:.1f}x")
+    print(f"end-to-end speedup (p50):    {old_e2e / new_e2e:.2f}x")
+    print(f"flat forest speedup (p50):   {new_e2e / flat_e2e:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Retrain wall time versus dataset size, on generated transactions2.csv files.
+
+For each size, a fresh workspace (no model yet) gets that many synthetic
+transactions, and one retraining run is started exactly the way the API's
+RetrainScheduler starts it (python -m src.scheduler, a fresh interpreter).
+Reports the process wall time (interpreter + imports included) and the
+trainer's own wall time and load/fit/save stages.
+
+    python -m benchmarks.bench_retrain --sizes 1000,10000,100000 > retrain.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.synthetic import Workspace
+
+
+def retrain_once(workspace, timeout):
+    report_path = os.path.join(workspace.root, "report.json")
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "src.scheduler", "--report-to", report_path],
+        cwd=workspace.root, env=workspace.env(), timeout=timeout, check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    elapsed = time.perf_counter() - start
+    with open(report_path, "r", encoding="utf-8") as file:
+        message = json.load(file)
+    if "error" in message:
+        raise RuntimeError(f"Retrain failed: {message['error']}")
+    return elapsed, message["report"]
+
+
+def run(sizes=(1000, 10000, 50000), repeats=1, seed=0, timeout=1800):
+    results = []
+    for rows in sizes:
+        runs = []
+        for _ in range(repeats):
+            # Full retrain from scratch (trainer.mode: full, empty registry)
+            with Workspace(rows=rows, seed=seed, settings={"trainer": {"mode": "full"}}, model=False) as workspace:
+                runs.append(retrain_once(workspace, timeout))
+        elapsed, report = min(runs, key=lambda run: run[0])  # best of the repeats
+        results.append({
+            "rows": rows,
+            "process_wall_s": round(elapsed, 3),
+            "trainer_wall_s": report["wall_time_s"],
+            "stages_s": report["stages_s"],
+            "rows_per_sec": round(rows / report["wall_time_s"]),
+            "published": report["published"]
+        })
+    return {"mode": "full", "repeats": repeats, "cpu_count": os.cpu_count(), "sizes": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000", help="comma separated row counts")
+    parser.add_argument("--repeats", type=int, default=1, help="runs per size, the fastest is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=1800)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(json.dumps(run(sizes, args.repeats, args.seed, args.timeout), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""End-to-end simulator throughput: events/sec of Market.simulate_step and the headless engine.
+
+    step          Market.simulate_step one event at a time (the dashboard's
+                  runner), pricing with an in-process engine or the HTTP API
+    headless      HeadlessSimulation ticks of many events, per pricer
+                  (local = registry model, base = no model)
+
+Transactions go to a NullSink unless --record, so storage is not what is
+timed. Runs in a throwaway workspace (see benchmarks/synthetic.py).
+
+    python -m benchmarks.bench_simulation --steps 5000 --events 200000 > simulation.json
+"""
+import argparse
+import json
+import time
+import warnings
+
+from benchmarks.synthetic import Workspace, load_products
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def make_sink(record):
+    from src.config import load_settings
+    from src.sinks import NullSink, make_sink as make_storage_sink
+    return make_storage_sink(load_settings()["storage"]) if record else NullSink()
+
+
+def bench_steps(engine, steps, seed, record, api_url=None):
+    from src.metrics import metrics
+    from src.simulation2 import Market
+
+    # engine=None + api_url: the remote PricingClient, through the API
+    market = Market(load_products(), sink=make_sink(record), api_url=api_url, seed=seed, engine=engine)
+    try:
+        for _ in range(min(100, steps)):
+            market.simulate_step()
+        metrics.reset("simulator_")  # per-stage latencies without the warmup
+
+        start = time.perf_counter()
+        for _ in range(steps):
+            market.simulate_step()
+        elapsed = time.perf_counter() - start
+        stats = market.stats()
+    finally:
+        market.close()
+    return {
+        "steps": steps,
+        "seconds": round(elapsed, 3),
+        "steps_per_sec": round(steps / elapsed, 1),
+        "latency": stats["latency"],
+        "client": stats["client"]
+    }
+
+
+def bench_headless(engine, pricer_name, events, tick, seed, record):
+    from src.headless import HeadlessSimulation, base_pricer, local_pricer
+    from src.simulation2 import Market
+
+    market = Market(load_products(), sink=make_sink(record), seed=seed, engine=engine)
+    try:
+        pricer = local_pricer() if pricer_name == "local" else base_pricer
+        sim = HeadlessSimulation(market, pricer=pricer, record=record, track_drift=pricer_name != "base")
+        sim.run(min(events, tick))  # warmup
+        return sim.run(events, tick)
+    finally:
+        market.close()
+
+
+def run(steps=5000, events=200000, tick=1000, seed=0, record=False, api_url=None):
+    """Expects to run inside a Workspace"""
+    from src.engine import PricingEngine
+
+    engine = PricingEngine()
+    if not engine.load_model():
+        raise RuntimeError("No model in the benchmark registry")
+
+    result = {
+        "record": record,
+        "step": {"local": bench_steps(engine, steps, seed, record)},
+        "headless": {pricer: bench_headless(engine, pricer, events, tick, seed, record) for pricer in ("local", "base")}
+    }
+    if api_url is not None:
+        result["step"]["api"] = bench_steps(None, steps, seed, record, api_url)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=5000, help="simulate_step calls")
+    parser.add_argument("--events", type=int, default=200000, help="headless shopper events")
+    parser.add_argument("--tick", type=int, default=1000, help="headless events per tick")
+    parser.add_argument("--api-url", default=None, help="also time simulate_step against this running API")
+    parser.add_argument("--record", action="store_true", help="write transactions (to the workspace)")
+    parser.add_argument("--rows", type=int, default=5000, help="synthetic transactions the model is trained on")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with Workspace(rows=args.rows, seed=args.seed):
+        result = run(args.steps, args.events, args.tick, args.seed, args.record, args.api_url)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Compares two benchmark reports (benchmarks.suite JSON), metric by metric.
+
+Prints every numeric value both reports share, with the relative change.
+Whether up is good depends on the metric: *_per_sec / *_rps should grow,
+*_ms / *_s should shrink.
+
+    python -m benchmarks.compare bench/before.json bench/after.json --filter p99
+"""
+import argparse
+import json
+
+# Keys that only describe the run, not its speed
+SKIP = {"environment", "workspace", "seed", "quick", "count", "runs", "requests", "steps", "events", "ticks",
+        "concurrency", "rows", "repeats", "cpu_count", "duration_s"}
+# List items are labelled by these keys instead of their position
+LABELS = ("concurrency", "rows")
+
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key not in SKIP:
+                yield from flatten(item, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            label = next((f"{key}={item[key]}" for key in LABELS if isinstance(item, dict) and key in item), str(i))
+            yield from flatten(item, f"{prefix}[{label}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--filter", default=None, help="only metrics whose name contains this")
+    args = parser.parse_args()
+
+    with open(args.before, "r", encoding="utf-8") as file:
+        before = dict(flatten(json.load(file)))
+    with open(args.after, "r", encoding="utf-8") as file:
+        after = dict(flatten(json.load(file)))
+
+    names = [name for name in before if name in after and (args.filter is None or args.filter in name)]
+    width = max((len(name) for name in names), default=10)
+    print(f"{'metric':<{width}} {'before':>12} {'after':>12} {'change':>9}")
+    for name in names:
+        old, new = before[name], after[name]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{name:<{width}} {old:>12.4g} {new:>12.4g} {change:>9}")
+
+
+if __name__ == "__main__":
+    main()
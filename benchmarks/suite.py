@@ -0,0 +1,100 @@
+"""Runs every offline benchmark and writes one JSON report, to compare runs.
+
+    engine       predict_price / PricingEngine latency per inference backend   (bench_engine)
+    api_load     closed-loop /predict load, throughput + p50/p95/p99          (bench_api_load)
+    simulation   simulate_step and headless events/sec                         (bench_simulation)
+    retrain      retrain wall time vs dataset size                             (bench_retrain)
+
+Everything runs on synthetic data in throwaway workspaces, with fixed seeds.
+
+    python -m benchmarks.suite --out bench/before.json
+    ... change something ...
+    python -m benchmarks.suite --out bench/after.json
+    python -m benchmarks.compare bench/before.json bench/after.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from benchmarks import bench_api_load, bench_engine, bench_retrain, bench_simulation
+from benchmarks.synthetic import REPO_ROOT, Workspace
+
+# --quick: a smoke run, numbers are only indicative
+QUICK = {"runs": 300, "duration": 1.0, "levels": (1, 4), "steps": 500, "events": 20000, "sizes": (1000, 5000)}
+FULL = {"runs": 2000, "duration": 5.0, "levels": (1, 4, 16), "steps": 5000, "events": 200000,
+        "sizes": (1000, 10000, 50000)}
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    import numpy
+    import sklearn
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=None, help="JSON report path (default: stdout)")
+    parser.add_argument("--only", default="engine,api_load,simulation,retrain", help="comma separated benchmarks")
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess", help="api_load target")
+    parser.add_argument("--workers", type=int, default=1, help="api_load: uvicorn worker processes")
+    parser.add_argument("--rows", type=int, default=5000, help="synthetic transactions the model is trained on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="small sizes, for a smoke run")
+    args = parser.parse_args()
+
+    only = set(args.only.split(","))
+    size = QUICK if args.quick else FULL
+    report = {"environment": environment(), "quick": args.quick, "seed": args.seed}
+
+    # 1. Everything that serves the synthetic model shares one workspace
+    with Workspace(rows=args.rows, seed=args.seed) as workspace:
+        report["workspace"] = {"rows": args.rows, "settings": workspace.settings}
+        if "engine" in only:
+            print("engine...", file=sys.stderr)
+            report["engine"] = bench_engine.run(size["runs"], seed=args.seed)
+        if "api_load" in only:
+            print("api_load...", file=sys.stderr)
+            report["api_load"] = bench_api_load.run(
+                args.target, size["levels"], size["duration"], workers=args.workers, workspace=workspace,
+                seed=args.seed
+            )
+        if "simulation" in only:
+            print("simulation...", file=sys.stderr)
+            report["simulation"] = bench_simulation.run(size["steps"], size["events"], seed=args.seed)
+
+    # 2. Retraining gets a fresh workspace per dataset size
+    if "retrain" in only:
+        print("retrain...", file=sys.stderr)
+        report["retrain"] = bench_retrain.run(size["sizes"], seed=args.seed)
+
+    text = json.dumps(report, indent=2)
+    if args.out is None:
+        print(text)
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as file:
+        file.write(text + "\n")
+    print(f"Wrote {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
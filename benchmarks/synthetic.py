@@ -0,0 +1,164 @@
+"""Synthetic transactions, model and a throwaway workspace for the benchmarks.
+
+Everything the app reads is relative to the working directory
+(configs/settings.yaml, data/transactions2.csv, models/registry), so the
+benchmarks run inside a temporary workspace holding generated transactions
+and a model trained on them, never the real data or registry:
+
+    with Workspace(rows=5000, seed=0):
+        ...  # cwd is the workspace, src.* only sees synthetic files
+
+The model has the same feature contract as Notebook/models/model_features.pkl
+(price, inventory, one-hot product), so it exercises the same serving code.
+"""
+import copy
+import datetime
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.config import _merge
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmark defaults on top of src/config.py DEFAULTS:
+# - the decision cache is off, so every request pays for a real price search
+# - drift never fires in the simulator, so no retrain lands in the middle of a timing
+# - transactions are written inline, no background flusher competing for the GIL
+BENCH_SETTINGS = {
+    "api": {"cache": {"enabled": False}},
+    "simulation": {"drift": {"accuracy_floor": 0.0, "ph_threshold": 1e9}},
+    "storage": {"background": False},
+    "logging": {"level": "WARNING"}
+}
+
+
+def load_products():
+    with open(os.path.join(REPO_ROOT, "configs", "products.yaml"), "r", encoding="utf-8") as file:
+        return yaml.safe_load(file)["products"]
+
+
+def generate_transactions(n_rows, products, seed=0):
+    """Shopper events like the simulator writes them (same columns, same buy rule)"""
+    rng = np.random.default_rng(seed)
+    names = np.array([p["name"] for p in products])
+    base_prices = np.array([p["base_price"] for p in products], dtype=float)
+
+    product = rng.integers(len(products), size=n_rows)
+    base = base_prices[product]
+    price = np.round(base * rng.uniform(0.7, 1.6, n_rows), 2)
+    inventory = rng.integers(0, 101, n_rows)
+    budget = np.round(rng.normal(1.0, 0.25, n_rows), 2)
+    # Shopper.decide: buys if in stock and the price is within its perceived value
+    purchased = (inventory > 0) & (price <= base * budget)
+
+    start = datetime.datetime(2026, 1, 1)
+    seconds = np.cumsum(rng.integers(1, 4, n_rows))
+    return pd.DataFrame({
+        "timestamp": [(start + datetime.timedelta(seconds=int(s))).strftime("%Y-%m-%d %H:%M:%S") for s in seconds],
+        "product_name": names[product],
+        "price_offered": price,
+        "inventory_level": inventory,
+        "budget_multiplier": budget,
+        "purchased": purchased.astype(int)
+    })
+
+
+def train_synthetic_model(df, n_estimators=100, max_depth=10, seed=0):
+    """A forest with the notebook model's feature contract. Returns (model, features)"""
+    from sklearn.ensemble import RandomForestClassifier
+    from src.trainer import encode
+
+    products = sorted(df["product_name"].unique())
+    features = ["price_offered", "inventory_level"] + [f"product_name_{p}" for p in products]
+    X, y = encode(df, features)
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=seed, n_jobs=-1)
+    model.fit(X, y)
+    return model, features
+
+
+class Workspace:
+    """A temporary working directory with configs, transactions and (optionally) a published model.
+
+    Entering it chdirs into it; leaving it chdirs back and deletes it.
+    """
+
+    def __init__(self, rows=5000, seed=0, settings=None, model=True, n_estimators=100, max_depth=10):
+        self.rows = rows
+        self.seed = seed
+        self.settings = _merge(copy.deepcopy(BENCH_SETTINGS), settings or {})
+        self.model = model
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.root = None
+        self.previous = None
+
+    def __enter__(self):
+        self.root = tempfile.mkdtemp(prefix="pricing-bench-")
+        self.previous = os.getcwd()
+        os.chdir(self.root)
+        try:
+            self._populate()
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        os.chdir(self.previous)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _populate(self):
+        os.makedirs("configs")
+        os.makedirs("data")
+        products = load_products()
+        with open("configs/products.yaml", "w", encoding="utf-8") as file:
+            yaml.safe_dump({"products": products}, file, allow_unicode=True)
+        with open("configs/settings.yaml", "w", encoding="utf-8") as file:
+            yaml.safe_dump(self.settings, file)
+
+        df = generate_transactions(self.rows, products, self.seed)
+        df.to_csv("data/transactions2.csv", index=False)
+        if not self.model:
+            return
+
+        from src.config import load_settings
+        from src.registry import ModelRegistry
+        from src.sketches import reference_profile
+
+        model, features = train_synthetic_model(df, self.n_estimators, self.max_depth, self.seed)
+        ModelRegistry().publish(model, features, {
+            "mode": "synthetic",
+            "rows_processed": len(df),
+            "seed": self.seed,
+            "input_reference": reference_profile(
+                df, load_settings()["trainer"]["reference_bins"], {p["name"]: p["base_price"] for p in products}
+            )
+        })
+
+    def env(self):
+        """Environment for subprocesses started in the workspace (python -m src.*)"""
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+        env.pop("PRICING_SETTINGS", None)
+        return env
+
+
+def latency_summary(seconds):
+    """count / mean / p50 / p95 / p99 / max in milliseconds, from per-call seconds"""
+    ms = np.asarray(seconds, dtype=float) * 1000
+    if len(ms) == 0:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "max_ms": round(float(ms.max()), 4)
+    }
@@ -1,11 +1,17 @@
-import pandas as pd
-import joblib
-import numpy as np
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
+from typing import List, Optional
 from contextlib import asynccontextmanager
-import os
-from src.trainer import run_retraining
+import logging
+import time
+from src.config import configure_logging
+from src.engine import PricingEngine
+from src.metrics import metrics
+from src.scheduler import RetrainScheduler
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # the standard contract for validating the input data
 class PricingRequest(BaseModel):
@@ -19,111 +25,116 @@ class PricingResponse(BaseModel):
     expected_revenue: float
     model_active: bool
 
-# global state, keeping the model in global state as I dont want o reload it 100 times all the time
+class BatchPricingRequest(BaseModel):
+    items: List[PricingRequest]
+
+class BatchPricingResponse(BaseModel):
+    results: List[PricingResponse]
 
-model_state = {
-    "model": None,
-    "features": None
-}
+# One engine per API process: model, hot swap, cache and scoring all live there
+engine = PricingEngine()
+registry = engine.registry
+settings = engine.settings
 
 # --- NEW: BACKGROUND RETRAINER ---
-def background_retrain():
-    print("Background Task: Retraining initiated...")
-    success = run_retraining()
-    if success:
-        print("Reloading Model in API...")
-        load_model() # This refreshes the Global Variable
-        print("System Healed! New model is live.")
-    else:
-        print("Retraining failed (insufficient data?)")
+# One training run at a time (in its own process), requests coalesce, and runs
+# are spaced by a minimum interval; a published model is hot swapped in
+scheduler = RetrainScheduler.from_settings(settings["api"]["retrain"], on_published=engine.load_model)
 
 # lifespan, it runs once when we start the server
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Starting Pricing API...")
-    load_model()
+    logger.info("Starting Pricing API...")
+    if registry.seed_from_legacy():
+        logger.info("Registry was empty, published the notebook model.")
+    engine.load_model()
     yield
-    print("Shutting down API...")
-    
-def load_model():
-    model_path = "A:\\study\\projects\\EtE_ETL_Dynamic_pricing__ML\\Notebook\\models\\predictor4.pkl"
-    model_features_path = "A:\\study\\projects\\EtE_ETL_Dynamic_pricing__ML\\Notebook\\models\\model_features.pkl"
-    
-    if os.path.exists(model_path) and os.path.exists(model_features_path):
-        model_state["model"] = joblib.load(model_path)
-        model_state["features"] = joblib.load(model_features_path)
-        print("Model & Features Loaded!")
-    else:
-        raise HTTPException(status_code=500, detail="Model or features not found")
+    logger.info("Shutting down API...")
+    scheduler.shutdown()
+
+def as_items(pricing_requests):
+    return [(r.product_name, r.base_price, r.inventory_level) for r in pricing_requests]
 
 # Initialze the APP
 app = FastAPI(lifespan=lifespan)
+
+# Known routes get their own latency histogram, anything else (404s, docs) is "other"
+TIMED_PATHS = {"/", "/predict", "/predict/batch", "/drift", "/reload", "/metrics",
+               "/retrain", "/retrain/status", "/retrain/last", "/retrain/cancel"}
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    path = request.url.path if request.url.path in TIMED_PATHS else "other"
+    metrics.histogram(
+        "pricing_http_request_seconds", "Request handling time, per endpoint", {"endpoint": path}
+    ).observe(time.perf_counter() - start)
+    return response
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    # Prometheus text format: HTTP, feature build, inference, argmax and retrain stage latencies
+    return metrics.render()
+
 @app.post("/retrain")
-def trigger_retrain(background_tasks: BackgroundTasks):
+def trigger_retrain():
     # We don't wait for training to finish. We return "OK" immediately.
-    background_tasks.add_task(background_retrain)
-    return {"status": "Retraining started in background"}
+    result = scheduler.request()
+    return {"status": f"Retraining {result}", **scheduler.status()}
+
+@app.get("/retrain/status")
+def retrain_status():
+    return scheduler.status()
+
+@app.get("/retrain/last")
+def retrain_last():
+    # Duration, outcome and trainer report of the last finished run
+    return scheduler.last_run()
+
+@app.post("/retrain/cancel")
+def retrain_cancel():
+    return {"cancelled": scheduler.cancel(), **scheduler.status()}
 
 
 @app.get("/")
 def health_check():
-    return {"status": "Working", "model_loaded": model_state["model"] is not None}
+    return {"status": "Working", **engine.status()}
 
 @app.post("/predict", response_model=PricingResponse)
 def predict_price(request: PricingRequest):
-    
-    if not model_state.get("model") or not model_state.get("features"):
-        
-        return {
-            "optimal_price": request.base_price,
-            "probability": 0.0,
-            "expected_revenue": 0.0,
-            "model_active": False
-        }
-
-    model = model_state["model"]
-    features = model_state["features"]
-    
-    # Generate 20 candidates
-    candidates = np.linspace(request.base_price * 0.7, request.base_price * 1.6, 20)
-    
-    # Create DataFrame
-    input_df = pd.DataFrame({
-        'price_offered': candidates,
-        'inventory_level': [request.inventory_level] * 20
-    })
-    
-    # One-Hot Encoding Logic
-    for feature in features:
-        if feature not in ['price_offered', 'inventory_level']:
-            if feature == f"product_name_{request.product_name}":
-                input_df[feature] = 1
-            else:
-                input_df[feature] = 0
-                
-    # Reorder to match training
-    input_df = input_df[features]
-    
-    # Predict
+    # Predict (base price if no model is loaded)
+    try:
+        return engine.price_many(as_items([request]))[0]
+    except Exception as e:
+        logger.exception("Prediction Error: %s", e)
+        raise HTTPException(status_code=500, detail="Model prediction failed")
+
+
+@app.post("/predict/batch", response_model=BatchPricingResponse)
+def predict_price_batch(batch: BatchPricingRequest):
+    # Same contract as /predict, but the whole catalog is scored in one model call
     try:
-        buy_probs = model.predict_proba(input_df)[:, 1]
-        expected_revenues = candidates * buy_probs
-        best_index = np.argmax(expected_revenues)
-        
-        return {
-            "optimal_price": float(candidates[best_index]),
-            "probability": float(buy_probs[best_index]),
-            "expected_revenue": float(expected_revenues[best_index]),
-            "model_active": True
-        }
+        return {"results": engine.price_many(as_items(batch.items))}
     except Exception as e:
-        print(f"Prediction Error: {e}")
+        logger.exception("Batch Prediction Error: %s", e)
         raise HTTPException(status_code=500, detail="Model prediction failed")
 
 
+@app.get("/drift")
+def input_drift():
+    # PSI / KS of recent traffic vs the served model's training data, per product
+    return engine.input_drift()
+
+
 # --- AUTO-RELOAD ENDPOINT (For Phase 3B) ---
 @app.post("/reload")
-def trigger_reload():
-    load_model()
-    return {"status": "Reloaded latest model"}
+def trigger_reload(version: Optional[str] = None):
+    # Only published versions: the name becomes a path, and the file behind it gets unpickled
+    if version is not None and not registry.has_version(version):
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {version}")
+    # Unpickling happens in the background, /predict keeps using the current model until the swap
+    if not engine.reload_in_background(version):
+        return {"status": "Reload already in progress"}
+    return {"status": "Reload started", "version": version or registry.latest_version()}
     
@@ -0,0 +1,128 @@
+"""Offline Monte Carlo backtests of pricing strategies.
+
+Every replica is an independent, seeded Market driven by the headless engine
+with one pricing policy. Replicas run in a process pool (one per core), and
+every policy sees the same seeds, so the comparison is paired and a run can
+be replayed exactly.
+
+    python -m src.backtest --policies base,latest,v0002 --replicas 64 --events 20000
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import yaml
+from scipy import stats
+
+from src.config import configure_logging
+from src.headless import HeadlessSimulation, base_pricer, local_pricer
+from src.pricing_client import NullPricingClient
+from src.simulation2 import Market
+from src.sinks import NullSink
+
+
+class FixedPricePolicy:
+    """Never reprices: every product stays at its base price"""
+    name = "base"
+
+    def pricer(self):
+        return base_pricer
+
+
+class ModelPolicy:
+    """Prices with a registry model: the latest one, or a given (candidate) version"""
+
+    def __init__(self, version=None):
+        self.version = version
+        self.name = version or "latest"
+
+    def pricer(self):
+        return local_pricer(self.version)
+
+
+def make_policy(name):
+    if name == "base":
+        return FixedPricePolicy()
+    if name == "latest":
+        return ModelPolicy()
+    return ModelPolicy(name)
+
+
+# Pricers are loaded once per worker process, not once per replica. The
+# policy's pricer does all the pricing, so replicas get a client that never
+# loads an engine or starts a retrain scheduler
+_pricers = {}
+_client = NullPricingClient()
+
+
+def run_replica(job):
+    policy, products, seed, events, events_per_tick = job
+    if policy.name not in _pricers:
+        _pricers[policy.name] = policy.pricer()
+
+    market = Market(products, sink=NullSink(), seed=seed, client=_client)
+    try:
+        sim = HeadlessSimulation(market, pricer=_pricers[policy.name], record=False, track_drift=False)
+        result = sim.run(events, events_per_tick)
+    finally:
+        market.close()
+    result["seed"] = seed
+    return result
+
+
+def confidence_interval(values, level=0.95):
+    values = np.asarray(values, dtype=float)
+    mean = values.mean()
+    if len(values) < 2:
+        return mean, mean, mean
+    half = stats.t.ppf((1 + level) / 2, len(values) - 1) * values.std(ddof=1) / np.sqrt(len(values))
+    return mean, mean - half, mean + half
+
+
+def summarize(results):
+    summary = {}
+    for metric in ("revenue", "sell_through", "stockouts", "lost_sales"):
+        mean, low, high = confidence_interval([r[metric] for r in results])
+        summary[metric] = {"mean": round(mean, 4), "ci95": [round(low, 4), round(high, 4)]}
+    return summary
+
+
+def run_backtest(policies, products, replicas=32, events=20000, events_per_tick=1000, seed=0, workers=None):
+    """Runs `replicas` seeded markets per policy and aggregates them.
+
+    Replica i uses the same seed under every policy (common random numbers).
+    """
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(replicas)]
+
+    report = {"replicas": replicas, "events": events, "seed": seed, "policies": {}}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for policy in policies:
+            jobs = [(policy, products, s, events, events_per_tick) for s in seeds]
+            results = list(pool.map(run_replica, jobs))
+            report["policies"][policy.name] = summarize(results)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pricing policies offline")
+    parser.add_argument("--policies", default="base,latest", help="comma separated: base, latest or a registry version")
+    parser.add_argument("--replicas", type=int, default=32)
+    parser.add_argument("--events", type=int, default=20000, help="shopper events per replica")
+    parser.add_argument("--tick", type=int, default=1000, help="shopper events per tick")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    args = parser.parse_args()
+    configure_logging()
+
+    with open("configs/products.yaml", "r", encoding="utf-8") as file:
+        products = yaml.safe_load(file)["products"]
+
+    policies = [make_policy(name.strip()) for name in args.policies.split(",")]
+    report = run_backtest(policies, products, args.replicas, args.events, args.tick, args.seed, args.workers)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class PriceCache:
+    """Bounded LRU + TTL cache of price decisions.
+
+    The optimal price only depends on (product, base_price, inventory), and the
+    simulator asks for the same few combinations over and over, so there is no
+    point in running the forest again for them.
+
+    Entries belong to one model "generation". Swapping the model happens inside
+    `swap()`, which holds the lock, bumps the generation and drops every entry,
+    so a request can never read (or store) a decision made by the old model
+    once the new one is live.
+    """
+
+    def __init__(self, max_size=4096, ttl_seconds=300, inventory_bucket=1, enabled=True):
+        self.enabled = enabled and max_size > 0
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.inventory_bucket = max(int(inventory_bucket), 1)
+
+        self._entries = OrderedDict()  # key -> (decision, expires_at)
+        self._lock = threading.Lock()
+        self.generation = 0
+
+        # Counters for the health endpoint
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            max_size=settings["max_size"],
+            ttl_seconds=settings["ttl_seconds"],
+            inventory_bucket=settings["inventory_bucket"],
+            enabled=settings["enabled"]
+        )
+
+    def key(self, product_name, base_price, inventory_level):
+        # With bucketing, e.g. inventory 40..44 share one decision
+        return (product_name, float(base_price), int(inventory_level) // self.inventory_bucket)
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            decision, expires_at = entry
+            if expires_at is not None and time.monotonic() > expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decision
+
+    def put(self, key, decision, generation):
+        """Stores a decision computed while `generation` was current.
+
+        If the model was swapped in the meantime the decision is stale and dropped.
+        """
+        if not self.enabled:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (decision, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @contextmanager
+    def swap(self):
+        """Wrap the model swap in this, so swap + invalidation are one atomic step"""
+        with self._lock:
+            yield
+            self.generation += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "generation": self.generation
+            }
@@ -0,0 +1,128 @@
+import copy
+import logging
+import os
+import yaml
+
+# Defaults for configs/settings.yaml, so an older/partial settings file keeps working
+DEFAULTS = {
+    "api": {
+        "model_format": "sklearn",
+        "inference": {
+            "backend": "sklearn",
+            "max_flat_rows": 1024,
+            "tolerance": 1e-9
+        },
+        "cache": {
+            "enabled": True,
+            "max_size": 4096,
+            "ttl_seconds": 300,
+            "inventory_bucket": 1
+        },
+        "surface": {
+            "enabled": False,
+            "catalog_path": "configs/products.yaml",
+            "max_inventory": 100
+        },
+        "search": {
+            "strategy": "grid",
+            "low": 0.7,
+            "high": 1.6,
+            "points": 20,
+            "coarse_points": 8,
+            "refine_points": 4,
+            "budget": 20,
+            "rounding": "none",
+            "max_calls": 4
+        },
+        "retrain": {
+            "min_interval_seconds": 60.0,
+            "timeout_seconds": 1800.0,
+            "separate_process": True
+        },
+        "input_drift": {
+            "enabled": True,
+            "max_count": 5000,
+            "min_count": 50
+        }
+    },
+    "simulation": {
+        "api_url": "http://127.0.0.1:8000",
+        "pricing_mode": "remote",
+        "recent_transactions": 300,
+        "drift": {
+            "window_size": 50,
+            "accuracy_floor": 0.5,
+            "ph_delta": 0.05,
+            "ph_threshold": 10.0,
+            "min_events": 30
+        },
+        "client": {
+            "timeout_seconds": 0.5,
+            "pool_size": 16,
+            "max_workers": 8
+        }
+    },
+    "storage": {
+        "backend": "csv",
+        "csv_path": "data/transactions2.csv",
+        "parquet_path": "data/transactions",
+        "compact_min_files": 16,
+        "flush_rows": 256,
+        "flush_interval_seconds": 1.0,
+        "max_buffer_rows": 10000,
+        "background": True
+    },
+    "trainer": {
+        "mode": "full",
+        "n_jobs": -1,
+        "holdout_fraction": 0.2,
+        "min_holdout_rows": 20,
+        "metric": "log_loss",
+        "min_improvement": 0.0,
+        "reference_bins": 10,
+        "catalog_path": "configs/products.yaml",
+        "search": [
+            {"n_estimators": 100, "max_depth": 10, "min_samples_leaf": 1},
+            {"n_estimators": 200, "max_depth": 8, "min_samples_leaf": 5},
+            {"n_estimators": 200, "max_depth": 12, "min_samples_leaf": 3},
+            {"n_estimators": 300, "max_depth": 6, "min_samples_leaf": 10}
+        ],
+        "incremental": {
+            "estimator": "forest",
+            "min_new_rows": 50,
+            "trees_per_update": 20,
+            "max_trees": 200
+        }
+    },
+    "logging": {
+        "level": "INFO",
+        "format": "%(asctime)s %(levelname)s %(name)s: %(message)s"
+    }
+}
+
+# Can be pointed somewhere else, e.g. PRICING_SETTINGS=configs/prod.yaml
+SETTINGS_PATH = os.environ.get("PRICING_SETTINGS", "configs/settings.yaml")
+
+
+def _merge(base, override):
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def load_settings(path=SETTINGS_PATH):
+    """Returns the defaults overlaid with whatever the settings file defines"""
+    settings = copy.deepcopy(DEFAULTS)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as file:
+            _merge(settings, yaml.safe_load(file) or {})
+    return settings
+
+
+def configure_logging(settings=None):
+    """Root logger setup for the entry points (API, scheduler child, CLIs)"""
+    settings = settings or load_settings()
+    logging.basicConfig(level=settings["logging"]["level"].upper(), format=settings["logging"]["format"])
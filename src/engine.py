@@ -0,0 +1,253 @@
+"""The pricing logic, independent of how it is called.
+
+The FastAPI app (src/api.py) is a thin HTTP layer over one PricingEngine, and
+the simulator can hold its own engine in-process (simulation.pricing_mode:
+local) to skip the JSON + localhost round trip. Both go through the same
+score_grid, so they return identical prices.
+"""
+import logging
+import threading
+import time
+import warnings
+
+from src.cache import PriceCache
+from src.config import load_settings
+from src.features import FeatureLayout
+from src.flat_forest import compile_forest
+from src.metrics import metrics
+from src.registry import ModelRegistry
+from src.search import DEFAULT_SEARCH, PriceSearch
+from src.sketches import InputMonitor
+from src.surface import PriceSurface
+
+logger = logging.getLogger(__name__)
+
+# We feed the model a raw float array laid out by FeatureLayout (column order is
+# checked at load time), so sklearn's "no feature names" warning is just noise.
+# Set here, so every engine user (API, local mode, headless, backtest) gets it
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+# Per-stage latency of one score_grid call (GET /metrics)
+FEATURE_BUILD = metrics.histogram("pricing_feature_build_seconds", "FeatureLayout.build, per search step")
+INFERENCE = metrics.histogram("pricing_inference_seconds", "predict_proba, per search step")
+ARGMAX = metrics.histogram("pricing_argmax_seconds", "Candidate generation, rounding and argmax, per search")
+SEARCH = metrics.histogram("pricing_search_seconds", "Whole price search (all steps), per batch")
+
+def score_grid(model, layout, product_names, base_prices, inventory_levels, search=DEFAULT_SEARCH):
+    """Finds the expected-revenue maximizing price for N products, batched.
+
+    Every step of the search scores its (N x k) candidates with ONE predict_proba
+    call (the default is the fixed 20-point grid between 0.7x and 1.6x base price).
+    Returns three arrays of length N: optimal price, its buy probability and expected revenue.
+    """
+    spent = [0.0]  # feature build + inference time, the rest of the search is argmax
+
+    def evaluate(candidates):
+        # Fill the model input in place (row i*k + j is candidate j of product i)
+        start = time.perf_counter()
+        X = layout.build(product_names, candidates, inventory_levels)
+        built = time.perf_counter()
+        probs = model.predict_proba(X)[:, 1].reshape(candidates.shape)
+        done = time.perf_counter()
+        FEATURE_BUILD.observe(built - start)
+        INFERENCE.observe(done - built)
+        spent[0] += done - start
+        return probs
+
+    start = time.perf_counter()
+    result = search.run(evaluate, base_prices)
+    total = time.perf_counter() - start
+    SEARCH.observe(total)
+    ARGMAX.observe(total - spent[0])
+    return result
+
+
+def fallback_price(base_price):
+    # No model loaded -> just keep the base price
+    return {
+        "optimal_price": base_price,
+        "probability": 0.0,
+        "expected_revenue": 0.0,
+        "model_active": False
+    }
+
+
+class ServingModel:
+    """Everything one model version needs to serve requests.
+
+    It is built completely off to the side (unpickling, layout, surface) and
+    then published with ONE reference assignment, so a request always sees
+    the model, its features and its lookup tables from the same version.
+    """
+
+    def __init__(self, bundle, layout, surface, monitor=None):
+        self.version = bundle.version
+        self.model = bundle.model
+        self.features = bundle.features
+        self.metadata = bundle.metadata
+        self.layout = layout    # FeatureLayout compiled from "features" at load time
+        self.surface = surface  # PriceSurface, only when api.surface.enabled
+        self.monitor = monitor  # InputMonitor, when the version has a training reference
+
+
+class PricingEngine:
+    """Loads registry models, hot swaps them and turns (product, base price,
+    inventory) items into price decisions.
+
+    items are (product_name, base_price, inventory_level) tuples, decisions
+    are the /predict response dicts.
+    """
+
+    def __init__(self, settings=None, registry=None):
+        self.settings = settings or load_settings()
+        self.registry = registry or ModelRegistry()
+
+        # Replaced by load_model, never mutated in place
+        self.active = None
+
+        # Only one reload (unpickle + swap) at a time
+        self.reload_lock = threading.Lock()
+
+        # Price decisions, flushed every time load_model swaps the model
+        self.cache = PriceCache.from_settings(self.settings["api"]["cache"])
+
+        # How candidate prices are searched (api.search)
+        self.search = PriceSearch.from_settings(self.settings["api"]["search"])
+
+    @property
+    def loaded(self):
+        return self.active is not None
+
+    def build_serving_model(self, version=None):
+        api_settings = self.settings["api"]
+        bundle = self.registry.load(version, model_format=api_settings["model_format"])
+        if bundle is None:
+            return None
+        model = bundle.model
+
+        # Optional: export the forest to flat arrays for low-latency scoring
+        # (checked against sklearn first, and kept as sklearn if they differ)
+        inference = api_settings["inference"]
+        if inference["backend"] == "flat":
+            model = compile_forest(model, bundle.features, inference["max_flat_rows"], inference["tolerance"])
+            bundle.model = model
+
+        # Compile the feature layout once, instead of per request
+        layout = FeatureLayout(bundle.features)
+        layout.check_model(model)
+
+        # Optional: tabulate every catalog product x inventory level up front
+        surface = None
+        surface_settings = api_settings["surface"]
+        if surface_settings["enabled"]:
+            surface = PriceSurface.from_catalog(
+                surface_settings["catalog_path"],
+                surface_settings["max_inventory"],
+                lambda names, prices, inventories: score_grid(model, layout, names, prices, inventories, self.search)
+            )
+            logger.info("Price surface ready: %d products x %d inventory levels", surface.table.shape[0], surface.levels)
+
+        # Traffic sketches start empty with every version: they are compared
+        # with THIS model's training data
+        monitor = InputMonitor.from_metadata(bundle.metadata, api_settings["input_drift"])
+
+        return ServingModel(bundle, layout, surface, monitor)
+
+    def load_model(self, version=None):
+        # The slow part runs while the current model keeps serving
+        serving = self.build_serving_model(version)
+        if serving is None:
+            logger.warning("No model in the registry, serving base prices.")
+            return False
+
+        # Swap + cache invalidation in one step, no request sees old decisions afterwards
+        with self.cache.swap():
+            self.active = serving
+        logger.info("Model %s & Features Loaded!", serving.version)
+        return True
+
+    def reload_in_background(self, version=None):
+        if not self.reload_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self.load_model(version)
+            except Exception as e:
+                logger.exception("Reload failed, keeping the current model: %s", e)
+            finally:
+                self.reload_lock.release()
+
+        threading.Thread(target=run, name="model-reload", daemon=True).start()
+        return True
+
+    def score(self, active, items):
+        optimal, probs, revenues = score_grid(
+            active.model,
+            active.layout,
+            [name for name, _, _ in items],
+            [base_price for _, base_price, _ in items],
+            [inventory for _, _, inventory in items],
+            self.search
+        )
+        return [
+            {
+                "optimal_price": float(optimal[i]),
+                "probability": float(probs[i]),
+                "expected_revenue": float(revenues[i]),
+                "model_active": True
+            }
+            for i in range(len(items))
+        ]
+
+    def price_many(self, items):
+        """Precomputed surface first, then the cache, and all the misses in one model call"""
+        # Grab the generation BEFORE touching the model, so a decision made while
+        # the model is being swapped is never stored
+        generation = self.cache.generation
+        active = self.active
+        if active is None:
+            return [fallback_price(base_price) for _, base_price, _ in items]
+        if not items:
+            return []
+
+        results = [None] * len(items)
+        if active.surface is not None:
+            results = [active.surface.lookup(*item) for item in items]
+
+        keys = [self.cache.key(*item) for item in items]
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                results[i] = self.cache.get(key)
+
+        misses = [i for i, decision in enumerate(results) if decision is None]
+        if misses:
+            scored = self.score(active, [items[i] for i in misses])
+            for i, decision in zip(misses, scored):
+                results[i] = decision
+                self.cache.put(keys[i], decision, generation)
+
+        if active.monitor is not None:
+            for name, base_price, inventory in items:
+                active.monitor.observe(name, base_price, inventory)
+
+        return results
+
+    def price(self, product_name, base_price, inventory_level):
+        return self.price_many([(product_name, base_price, inventory_level)])[0]
+
+    def input_drift(self):
+        active = self.active
+        if active is None or active.monitor is None:
+            return {"status": "unavailable", "model_version": active.version if active is not None else None}
+        return {"model_version": active.version, **active.monitor.report()}
+
+    def status(self):
+        active = self.active
+        return {
+            "model_loaded": active is not None,
+            "model_version": active.version if active is not None else None,
+            "model_metadata": active.metadata if active is not None else None,
+            "cache": self.cache.stats(),
+            "surface": active.surface.stats() if active is not None and active.surface is not None else None
+        }
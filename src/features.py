@@ -0,0 +1,69 @@
+import threading
+import numpy as np
+
+PRODUCT_PREFIX = "product_name_"
+
+
+class FeatureLayout:
+    """Feature contract compiled once per model.
+
+    Instead of building a pandas DataFrame and one-hot columns on every request,
+    we resolve the column index of every feature up front and fill a preallocated
+    float32 buffer in place (float32 is what the sklearn trees consume anyway, so
+    the model doesn't have to copy/convert the input again).
+    """
+
+    def __init__(self, features):
+        self.features = list(features)
+        self.n_features = len(self.features)
+
+        # Column positions of the numeric inputs
+        self.price_col = self.features.index("price_offered")
+        self.inventory_col = self.features.index("inventory_level")
+
+        # product -> column index of its one-hot flag
+        self.product_index = {
+            f[len(PRODUCT_PREFIX):]: i
+            for i, f in enumerate(self.features)
+            if f.startswith(PRODUCT_PREFIX)
+        }
+        self.product_cols = np.array(sorted(self.product_index.values()), dtype=np.intp)
+
+        # Every request thread gets its own buffer (FastAPI runs sync endpoints in a threadpool)
+        self._local = threading.local()
+
+    def check_model(self, model):
+        # The model must have been trained on exactly this column order,
+        # otherwise feeding it a raw array would silently mix up the inputs
+        trained_on = getattr(model, "feature_names_in_", None)
+        if trained_on is not None and list(trained_on) != self.features:
+            raise ValueError(f"Model features {list(trained_on)} do not match feature list {self.features}")
+
+    def _buffer(self, rows):
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[0] < rows:
+            # Template: all zeros, only the columns we touch are ever written
+            buf = np.zeros((max(rows, 20), self.n_features), dtype=np.float32)
+            self._local.buf = buf
+        return buf[:rows]
+
+    def build(self, product_names, candidates, inventory_levels):
+        """Fills the (N * k, n_features) model input for N products x k candidate prices.
+
+        Row i*k + j is candidate j of product i. The returned array is a view into a
+        per-thread buffer, so it is only valid until the next build() on this thread.
+        """
+        n, k = candidates.shape
+        X = self._buffer(n * k)
+
+        X[:, self.price_col] = candidates.ravel()
+        X[:, self.inventory_col] = np.repeat(np.asarray(inventory_levels, dtype=np.float32), k)
+
+        # One-Hot: clear the flags of the previous request, then set ours
+        X[:, self.product_cols] = 0
+        for i, name in enumerate(product_names):
+            col = self.product_index.get(name)
+            if col is not None:  # unknown products keep all flags at 0
+                X[i * k:(i + 1) * k, col] = 1
+
+        return X
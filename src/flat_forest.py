@@ -0,0 +1,186 @@
+import logging
+import os
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# One .npy file per array, so each one can be memory-mapped on its own
+ARRAYS = ("children", "feature", "threshold", "value", "roots", "depth")
+
+
+class FlatForest:
+    """A fitted RandomForestClassifier flattened into a few plain NumPy arrays.
+
+    All trees are concatenated into one node table, stored ready to walk:
+    children[2 * node] / children[2 * node + 1] are the global indexes of a
+    node's left / right child (a leaf points to itself, so stepping every tree
+    a fixed `depth` levels is safe), and `value` holds each node's class
+    probabilities. The index arrays are saved as intp, the dtype the walk
+    indexes with, so nothing is converted at load time. Saved as .npy files,
+    the table can be opened with mmap_mode="r": loading is then near-instant
+    and every API worker maps the same read-only pages, instead of each one
+    unpickling its own private copy of the forest (sklearn's Tree copies the
+    node arrays on unpickle, so joblib's mmap_mode can't help there).
+    """
+
+    def __init__(self, children, feature, threshold, value, roots, depth, features, classes):
+        self.children = children
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.depth = depth  # 0-d array: depth of the deepest tree
+        self.feature_names_in_ = np.array(features, dtype=object)
+        self.n_features_in_ = len(features)
+        self.classes_ = np.asarray(classes)
+        self.chunk_rows = 1024
+
+    @classmethod
+    def from_sklearn(cls, forest, features):
+        children, feature, threshold, value, roots = [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            nodes = np.arange(tree.node_count) + offset
+
+            roots.append(offset)
+            children.append(np.stack([
+                np.where(is_leaf, nodes, tree.children_left + offset),
+                np.where(is_leaf, nodes, tree.children_right + offset)
+            ], axis=1).ravel())
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+
+            # Per-node class probabilities, like DecisionTreeClassifier.predict_proba
+            counts = tree.value[:, 0, :]
+            value.append(counts / counts.sum(axis=1, keepdims=True))
+            offset += tree.node_count
+
+        return cls(
+            np.concatenate(children).astype(np.intp),
+            np.concatenate(feature).astype(np.intp),
+            np.concatenate(threshold).astype(np.float64),
+            np.concatenate(value).astype(np.float64),
+            np.array(roots, dtype=np.intp),
+            np.array(max(e.tree_.max_depth for e in forest.estimators_), dtype=np.intp),
+            features,
+            forest.classes_
+        )
+
+    def save(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(folder, f"{name}.npy"), getattr(self, name))
+        np.save(os.path.join(folder, "classes.npy"), self.classes_)
+
+    @classmethod
+    def load(cls, folder, features, mmap_mode="r"):
+        arrays = [np.load(os.path.join(folder, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS]
+        classes = np.load(os.path.join(folder, "classes.npy"))
+        return cls(*arrays, features, classes)
+
+    @staticmethod
+    def exists(folder):
+        return all(os.path.exists(os.path.join(folder, f"{name}.npy")) for name in ARRAYS + ("classes",))
+
+    def is_split(self):
+        # Split nodes are the ones whose left child is another node
+        return np.asarray(self.children[0::2]) != np.arange(len(self.feature))
+
+    def predict_proba(self, X):
+        """All trees x a chunk of rows in one walk: `node` is a (trees, rows)
+        array stepped down one level per iteration, no Python loop over trees.
+        Rows go in chunks of `chunk_rows`, so memory stays at trees x chunk_rows
+        whatever the batch size.
+        """
+        # sklearn's trees compare float32 inputs against float64 thresholds, so do we
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) <= self.chunk_rows:
+            return self._walk(X)
+        return np.concatenate([self._walk(X[i:i + self.chunk_rows]) for i in range(0, len(X), self.chunk_rows)])
+
+    def _walk(self, X):
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[None, :]
+        node = np.repeat(np.asarray(self.roots)[:, None], n_rows, axis=1)
+
+        # Straight off the (memory-mapped) arrays: gathers only, no private copies
+        for _ in range(int(self.depth)):
+            go_right = flat_X[row_offsets + self.feature[node]] > self.threshold[node]
+            node = self.children[2 * node + go_right]
+
+        return self.value[node].mean(axis=0)
+
+    def check_against(self, forest, n_rows=512, tolerance=1e-9, seed=0):
+        """Max |difference| of predict_proba vs the sklearn forest on probe rows.
+
+        Probe values sit exactly on, and just around, the forest's own split
+        thresholds, so both sides of every comparison (ties included) are hit.
+        """
+        rng = np.random.default_rng(seed)
+        X = np.zeros((n_rows, self.n_features_in_), dtype=np.float32)
+        splits = self.is_split()
+        for f in range(self.n_features_in_):
+            thresholds = np.asarray(self.threshold)[splits & (np.asarray(self.feature) == f)]
+            if len(thresholds) == 0:
+                continue
+            values = rng.choice(thresholds, n_rows)
+            spread = max(np.ptp(thresholds), 1.0) * 1e-3
+            X[:, f] = values + rng.choice([-spread, 0.0, spread], n_rows)
+
+        difference = float(np.max(np.abs(self.predict_proba(X) - forest.predict_proba(X))))
+        return difference, difference <= tolerance
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class FastForest:
+    """Serves a forest through its FlatForest for small batches (a /predict
+    call scores ~20 rows, where sklearn's per-call overhead dominates) and
+    through sklearn itself for big ones (catalog batches, the price surface),
+    where sklearn's compiled per-tree loop wins.
+    """
+
+    def __init__(self, flat, forest, max_rows=1024):
+        self.flat = flat
+        self.forest = forest
+        self.max_rows = max_rows
+        self.feature_names_in_ = flat.feature_names_in_
+        self.n_features_in_ = flat.n_features_in_
+        self.classes_ = flat.classes_
+
+    def predict_proba(self, X):
+        if len(X) <= self.max_rows:
+            return self.flat.predict_proba(X)
+        return self.forest.predict_proba(X)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compile_forest(forest, features, max_rows=1024, tolerance=1e-9):
+    """Exports a fitted forest to a FastForest, if it passes the self-check.
+
+    Anything that is not a sklearn tree ensemble, or a flat copy whose
+    probabilities differ from sklearn's by more than `tolerance`, is returned
+    unchanged (served by sklearn). A FlatForest (model_format: flat) has no
+    sklearn forest to fall back on: it walks every batch in chunks of max_rows.
+    """
+    if isinstance(forest, FlatForest):
+        forest.chunk_rows = max_rows
+        return forest
+
+    estimators = getattr(forest, "estimators_", None)
+    if not estimators or not hasattr(estimators[0], "tree_"):
+        return forest
+
+    flat = FlatForest.from_sklearn(forest, features)
+    flat.chunk_rows = max_rows
+    difference, ok = flat.check_against(forest, tolerance=tolerance)
+    if not ok:
+        logger.warning("Flat forest differs from sklearn by %.2e (> %s), serving sklearn.", difference, tolerance)
+        return forest
+    return FastForest(flat, forest, max_rows)
@@ -0,0 +1,221 @@
+"""Headless, vectorized version of Market.simulate_step.
+
+Instead of one Shopper object + one HTTP call + one CSV append per event, a
+tick draws thousands of shoppers at once as NumPy arrays, applies the same
+Shopper.decide rule to all of them, and updates inventory/revenue in bulk.
+Pricing is done once per tick for the whole catalog (one batch call).
+
+    python -m src.headless --events 1000000 --tick 5000 --pricer local
+"""
+import argparse
+import datetime
+import time
+
+import numpy as np
+import yaml
+
+from src.config import configure_logging
+from src.simulation2 import Market
+
+
+def prior_count(groups, flags):
+    """For every event: how many earlier events of the same group had flag set.
+
+    Sort-based grouped exclusive cumsum, O(n log n) whatever the number of groups.
+    """
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    sorted_flags = flags[order].astype(np.int64)
+
+    exclusive = np.cumsum(sorted_flags) - sorted_flags
+    group_start = np.searchsorted(sorted_groups, sorted_groups, side="left")
+
+    counts = np.empty_like(exclusive)
+    counts[order] = exclusive - exclusive[group_start]
+    return counts
+
+
+# A pricer takes the Catalog and returns four arrays indexed by product id:
+# new prices, buy probabilities, expected revenues, and whether the probability
+# is a real model answer (a stale/fallback quote says nothing about the model)
+
+def api_pricer(market):
+    # One /predict/batch round trip for the whole catalog
+    def price(catalog):
+        quotes = market.client.quote_many([(p.name, p.base_price, p.inventory) for p in catalog])
+        return (
+            np.array([q.price for q in quotes], dtype=float),
+            np.array([q.probability for q in quotes], dtype=float),
+            np.array([q.expected_revenue for q in quotes], dtype=float),
+            np.array([q.source == "api" for q in quotes])
+        )
+    return price
+
+
+def base_pricer(catalog):
+    # No model at all: every product stays at its base price
+    zeros = np.zeros(len(catalog))
+    return catalog.base_price.copy(), zeros, zeros, np.zeros(len(catalog), dtype=bool)
+
+
+def local_pricer(version=None):
+    """Prices in-process with a PricingEngine (registry model), no HTTP involved"""
+    from src.engine import PricingEngine
+
+    engine = PricingEngine()
+    if not engine.load_model(version):
+        raise RuntimeError("No model in the registry")
+
+    def price(catalog):
+        items = list(zip(catalog.names, catalog.base_price.tolist(), np.maximum(catalog.inventory, 0).tolist()))
+        decisions = engine.price_many(items)
+        return (
+            np.array([d["optimal_price"] for d in decisions]),
+            np.array([d["probability"] for d in decisions]),
+            np.array([d["expected_revenue"] for d in decisions]),
+            np.array([d["model_active"] for d in decisions])
+        )
+
+    return price
+
+
+class HeadlessSimulation:
+    """Drives a Market with vectorized ticks of many shopper events"""
+
+    def __init__(self, market, pricer=None, seed=None, record=True, track_drift=True, reprice_every=1):
+        self.market = market
+        self.pricer = pricer if pricer is not None else api_pricer(market)
+        # Default to the Market's own stream, so a seeded Market is a reproducible run
+        self.rng = np.random.default_rng(seed) if seed is not None else market.np_rng
+        self.record = record
+        self.track_drift = track_drift
+        self.reprice_every = reprice_every
+
+        self.ticks = 0
+        self.events = 0
+        self.sales = 0
+        self.lost_sales = 0  # shoppers who would have bought, but found the shelf empty
+        self.drift_ticks = 0
+
+    def tick(self, n_events):
+        catalog = self.market.products
+
+        # 1. AI Re-pricing, the whole catalog in one call
+        if self.ticks % self.reprice_every == 0:
+            new_prices, self.predicted, exp_revs, self.scored = self.pricer(catalog)
+            self.market.apply_prices(new_prices, self.predicted, exp_revs)
+
+        # The catalog's own arrays, no per-product objects
+        base = catalog.base_price
+        price = catalog.price
+        inventory = catalog.inventory
+
+        # 2. Shoppers, as arrays (same distribution as Shopper)
+        budget = self.rng.normal(1.0, 0.25, n_events)
+        choice = self.rng.integers(0, len(catalog), n_events)
+
+        # 3. Shopper.decide, vectorized
+        wants = price[choice] <= base[choice] * budget
+
+        # Events are still processed "in order": a shopper only finds stock if
+        # the earlier buyers of the same product didn't empty the shelf
+        bought_before = np.minimum(prior_count(choice, wants), inventory[choice])
+        inventory_seen = inventory[choice] - bought_before
+        purchased = wants & (inventory_seen > 0)
+
+        # 4. Bulk updates
+        sold = np.bincount(choice[purchased], minlength=len(catalog))
+        revenue = np.bincount(choice[purchased], weights=price[choice][purchased], minlength=len(catalog))
+        catalog.inventory -= sold
+        catalog.sold_count += sold
+        catalog.revenue += revenue
+
+        # 5. Transactions, one bulk write
+        if self.record:
+            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            names = catalog.names
+            self.market.save_transactions([
+                {
+                    "timestamp": timestamp,
+                    "product_name": names[c],
+                    "price_offered": pr,
+                    "inventory_level": inv,
+                    "budget_multiplier": b,
+                    "purchased": y
+                }
+                for c, pr, inv, b, y in zip(
+                    choice.tolist(),
+                    price[choice].tolist(),
+                    inventory_seen.tolist(),
+                    np.round(budget, 2).tolist(),
+                    purchased.astype(int).tolist()
+                )
+            ])
+
+        # 6. Observer, on the events priced by a real model answer only
+        if self.track_drift:
+            names = np.array(catalog.names)
+            scored = self.scored[choice]
+            self.market.drift_detector.add_events(
+                self.predicted[choice][scored], purchased[scored], names[choice][scored]
+            )
+            acc, drift = self.market.drift_detector.check_health()
+            self.market.current_accuracy = acc
+            self.drift_ticks += int(drift)
+
+        self.ticks += 1
+        self.events += n_events
+        self.sales += int(purchased.sum())
+        self.lost_sales += int((wants & ~purchased).sum())
+
+    def run(self, n_events, events_per_tick=1000):
+        start = time.perf_counter()
+        remaining = n_events
+        while remaining > 0:
+            n = min(events_per_tick, remaining)
+            self.tick(n)
+            remaining -= n
+        return self.summary(time.perf_counter() - start)
+
+    def summary(self, elapsed=None):
+        catalog = self.market.products
+        initial = int((catalog.inventory + catalog.sold_count).sum())
+        result = {
+            "events": self.events,
+            "ticks": self.ticks,
+            "sales": self.sales,
+            "revenue": round(float(catalog.revenue.sum()), 2),
+            "sell_through": round(self.sales / initial, 4) if initial else 0.0,
+            "stockouts": int((catalog.inventory <= 0).sum()),
+            "lost_sales": self.lost_sales,
+            "drift_ticks": self.drift_ticks
+        }
+        if elapsed is not None:
+            result["seconds"] = round(elapsed, 3)
+            result["events_per_sec"] = round(self.events / elapsed) if elapsed > 0 else None
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the market headless, vectorized")
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--tick", type=int, default=1000, help="shopper events per tick")
+    parser.add_argument("--pricer", choices=["api", "local", "base"], default="local")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-record", action="store_true", help="don't write transactions")
+    args = parser.parse_args()
+    configure_logging()
+
+    with open("configs/products.yaml", "r", encoding="utf-8") as file:
+        config = yaml.safe_load(file)
+    market = Market(config["products"], seed=args.seed)
+
+    pricer = {"api": lambda: api_pricer(market), "local": local_pricer, "base": lambda: base_pricer}[args.pricer]()
+    # Base prices come with no probability, nothing to monitor
+    sim = HeadlessSimulation(market, pricer=pricer, record=not args.no_record, track_drift=args.pricer != "base")
+    print(sim.run(args.events, args.tick))
+    market.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Low-overhead latency metrics, exposed Prometheus-style.
+
+A Histogram is a fixed list of bucket bounds and counters: observing a value
+is one bisect and two additions under a lock, cheap enough for the hot
+paths. Every process has one `metrics` registry; the API renders it on
+GET /metrics, the simulator exposes a snapshot() of it.
+
+    with metrics.histogram("pricing_inference_seconds", "predict_proba").time():
+        ...
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds: 50us .. 10s, roughly x2.5 apart
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+# Seconds: training stages
+TRAINING_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one: +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def reset(self):
+        with self.lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        with self.lock:
+            counts, total = list(self.counts), self.count
+        if total == 0:
+            return None
+        rank, seen = q * total, 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        with self.lock:
+            count, total = self.count, self.sum
+        return {
+            "count": count,
+            "mean_ms": round(total / count * 1000, 3) if count else None,
+            "p50_ms_le": self._ms(self.quantile(0.5)),
+            "p99_ms_le": self._ms(self.quantile(0.99))
+        }
+
+    @staticmethod
+    def _ms(seconds):
+        return None if seconds is None else round(seconds * 1000, 3)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+
+def format_labels(labels, extra=None):
+    labels = dict(labels, **(extra or {}))
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}  # (name, sorted label items) -> Histogram / Counter
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        key = (name, tuple(sorted((labels or {}).items())))
+        metric = self.metrics.get(key)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.get(key)
+                if metric is None:
+                    metric = self.metrics[key] = cls(name, help_text, labels, **kwargs)
+        return metric
+
+    def histogram(self, name, help_text="", labels=None, buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def counter(self, name, help_text="", labels=None):
+        return self._get(Counter, name, help_text, labels)
+
+    def reset(self, prefix=""):
+        """Zeroes the histograms whose name starts with prefix (benchmarks, between runs)"""
+        for (name, _), metric in list(self.metrics.items()):
+            if name.startswith(prefix) and isinstance(metric, Histogram):
+                metric.reset()
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines, described = [], set()
+        for (name, _), metric in sorted(self.metrics.items(), key=lambda item: item[0]):
+            kind = "histogram" if isinstance(metric, Histogram) else "counter"
+            if name not in described:
+                lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {kind}")
+                described.add(name)
+
+            if kind == "counter":
+                lines.append(f"{name}{format_labels(metric.labels)} {metric.value}")
+                continue
+
+            with metric.lock:
+                counts, total, count = list(metric.counts), metric.sum, metric.count
+            cumulative = 0
+            for bound, n in zip(metric.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{format_labels(metric.labels, {'le': le})} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(metric.labels)} {total}")
+            lines.append(f"{name}_count{format_labels(metric.labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self, prefix=""):
+        """Dict view (name{labels} -> count/mean/p50/p99, or counter value), for dashboards"""
+        snapshot = {}
+        for (name, _), metric in sorted(self.metrics.items(), key=lambda item: item[0]):
+            if not name.startswith(prefix):
+                continue
+            key = name + format_labels(metric.labels)
+            snapshot[key] = metric.snapshot() if isinstance(metric, Histogram) else metric.value
+        return snapshot
+
+
+class StageTimer:
+    """Wall time per named stage, for code whose metrics must travel in a
+    report (the trainer runs in a child process with its own registry).
+    lap(stage) charges the time since the previous lap to `stage`.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.seconds[stage] = round(self.seconds.get(stage, 0.0) + now - self.last, 4)
+        self.last = now
+
+
+# One registry per process
+metrics = MetricsRegistry()
@@ -0,0 +1,253 @@
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ROUND_TRIP = metrics.histogram("simulator_http_round_trip_seconds", "POST /predict round trip, as seen by the simulator")
+
+# source: "api" = fresh model answer, "stale" = last known good price (API slow/down),
+#         "fallback" = base price, nothing better known
+Quote = namedtuple("Quote", ["price", "probability", "expected_revenue", "source"])
+
+
+class PricingClient:
+    """Client for the pricing API, built for a high event rate.
+
+    - one pooled keep-alive Session, instead of a new TCP connection per call
+    - requests run on a small thread pool, so several can be in flight at once
+    - identical in-flight requests (same product / base price / inventory) are
+      coalesced into a single HTTP call
+    - if the API doesn't answer within `timeout`, the last known good quote for
+      that product is used; the slow request keeps running and refreshes it
+    """
+
+    def __init__(self, api_url, timeout=0.5, pool_size=16, max_workers=8):
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pricing")
+        self._lock = threading.Lock()
+        self._inflight = {}    # request key -> Future
+        self._last_good = {}   # product name -> Quote
+
+        self.coalesced = 0
+        self.stale = 0
+        self.errors = 0
+
+    def _post(self, path, payload, timeout):
+        response = self.session.post(f"{self.api_url}{path}", json=payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _fetch(self, payload):
+        with ROUND_TRIP.time():
+            data = self._post("/predict", payload, timeout=max(self.timeout * 4, 2.0))
+        # Same mapping as local mode: no model loaded -> a base price "fallback" quote
+        quote = to_quote(data)
+        if quote.source == "api":
+            with self._lock:
+                self._last_good[payload["product_name"]] = quote
+        else:
+            logger.debug("API has no model loaded, got the base price back")
+        return quote
+
+    def submit(self, product_name, base_price, inventory_level):
+        """Starts (or joins) a /predict call, returns its Future"""
+        key = (product_name, float(base_price), int(inventory_level))
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+
+            payload = {"product_name": product_name, "base_price": base_price, "inventory_level": inventory_level}
+            future = self.executor.submit(self._fetch, payload)
+            self._inflight[key] = future
+
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def result(self, future, product_name, base_price):
+        """Waits up to `timeout` for a submitted call, else falls back"""
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            logger.warning("Pricing API slow for %s, using last known price", product_name)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Pricing API error for %s: %s", product_name, e)
+        return self.fallback(product_name, base_price)
+
+    def fallback(self, product_name, base_price):
+        with self._lock:
+            quote = self._last_good.get(product_name)
+        if quote is not None:
+            self.stale += 1
+            return quote._replace(source="stale")
+        return Quote(base_price, 0.0, 0.0, "fallback")
+
+    def quote(self, product_name, base_price, inventory_level):
+        future = self.submit(product_name, base_price, inventory_level)
+        return self.result(future, product_name, base_price)
+
+    def quote_many(self, items):
+        """One /predict/batch call for a list of (product_name, base_price, inventory_level)"""
+        payload = {
+            "items": [
+                {"product_name": name, "base_price": base_price, "inventory_level": inventory}
+                for name, base_price, inventory in items
+            ]
+        }
+        try:
+            results = self._post("/predict/batch", payload, timeout=max(self.timeout * 4, 2.0))["results"]
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Pricing API batch error: %s", e)
+            return [self.fallback(name, base_price) for name, base_price, _ in items]
+
+        quotes = [to_quote(r) for r in results]
+        with self._lock:
+            for (name, _, _), quote in zip(items, quotes):
+                if quote.source == "api":
+                    self._last_good[name] = quote
+        return quotes
+
+    def retrain(self):
+        self._post("/retrain", None, timeout=1.0)
+
+    def stats(self):
+        with self._lock:
+            inflight = len(self._inflight)
+        return {"inflight": inflight, "coalesced": self.coalesced, "stale": self.stale, "errors": self.errors}
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+class LocalPricingClient:
+    """Same interface as PricingClient, but prices with an in-process
+    PricingEngine: no JSON, no localhost hop. For single-box runs.
+    """
+
+    def __init__(self, engine, scheduler=None, owns_scheduler=False):
+        self.engine = engine
+        self.scheduler = scheduler  # None: retraining is off for this client
+        self.owns_scheduler = owns_scheduler
+
+    def submit(self, product_name, base_price, inventory_level):
+        # Scoring is synchronous, hand back an already finished Future
+        future = Future()
+        try:
+            future.set_result(self.quote(product_name, base_price, inventory_level))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def result(self, future, product_name, base_price):
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning("Local pricing error for %s: %s", product_name, e)
+            return Quote(base_price, 0.0, 0.0, "fallback")
+
+    def quote(self, product_name, base_price, inventory_level):
+        decision = self.engine.price(product_name, base_price, inventory_level)
+        return to_quote(decision)
+
+    def quote_many(self, items):
+        return [to_quote(decision) for decision in self.engine.price_many(list(items))]
+
+    def retrain(self):
+        # Same scheduling as POST /retrain
+        if self.scheduler is None:
+            raise RuntimeError("Retraining is not enabled for this pricing client")
+        self.scheduler.request()
+
+    def stats(self):
+        return {"mode": "local", **self.engine.status()["cache"]}
+
+    def close(self):
+        if self.owns_scheduler:
+            self.scheduler.shutdown()
+
+
+class NullPricingClient:
+    """Same interface, prices nothing: base price fallback quotes, no retraining.
+    For Markets whose prices come from elsewhere (backtest replicas)
+    """
+
+    def submit(self, product_name, base_price, inventory_level):
+        future = Future()
+        future.set_result(self.quote(product_name, base_price, inventory_level))
+        return future
+
+    def result(self, future, product_name, base_price):
+        return future.result()
+
+    def quote(self, product_name, base_price, inventory_level):
+        return Quote(base_price, 0.0, 0.0, "fallback")
+
+    def quote_many(self, items):
+        return [self.quote(*item) for item in items]
+
+    def retrain(self):
+        raise RuntimeError("Retraining is not enabled for this pricing client")
+
+    def stats(self):
+        return {"mode": "null"}
+
+    def close(self):
+        pass
+
+
+def to_quote(decision):
+    source = "api" if decision["model_active"] else "fallback"
+    return Quote(decision["optimal_price"], decision["probability"], decision["expected_revenue"], source)
+
+
+def make_pricing_client(simulation, api_url=None, engine=None, scheduler=None):
+    """simulation.pricing_mode: "remote" (HTTP API) or "local" (in-process engine).
+
+    In local mode, retrains go through `scheduler`. A client that loads its own
+    engine also starts its own scheduler, like the API does; a client handed an
+    engine (benchmarks, backtests) only retrains if it's handed a scheduler too.
+    """
+    if engine is not None or simulation["pricing_mode"] == "local":
+        owns_scheduler = False
+        if engine is None:
+            from src.engine import PricingEngine
+            from src.scheduler import RetrainScheduler
+            engine = PricingEngine()
+            engine.load_model()
+            if scheduler is None:
+                scheduler = RetrainScheduler.from_settings(
+                    engine.settings["api"]["retrain"], on_published=engine.load_model
+                )
+                owns_scheduler = True
+        return LocalPricingClient(engine, scheduler, owns_scheduler)
+
+    client = simulation["client"]
+    return PricingClient(
+        api_url or simulation["api_url"],
+        timeout=client["timeout_seconds"],
+        pool_size=client["pool_size"],
+        max_workers=client["max_workers"]
+    )
@@ -0,0 +1,147 @@
+import datetime
+import json
+import os
+import re
+import shutil
+import joblib
+from src.flat_forest import FlatForest
+
+REGISTRY_DIR = "models/registry"
+
+# Version folder names, as publish() makes them (v0001, v0002, ...)
+VERSION_PATTERN = re.compile(r"^v\d{4,}$")
+
+# Models trained in the notebook, used to seed an empty registry
+LEGACY_MODEL_PATH = "Notebook/models/predictor4.pkl"
+LEGACY_FEATURES_PATH = "Notebook/models/model_features.pkl"
+
+
+class ModelBundle:
+    """One published model version: the model and its feature contract always travel together"""
+
+    def __init__(self, version, model, features, metadata):
+        self.version = version
+        self.model = model
+        self.features = features
+        self.metadata = metadata
+
+
+class ModelRegistry:
+    """Versioned model artifacts in one directory:
+
+        models/registry/
+            v0001/bundle.joblib    {"model": ..., "features": [...]}
+            v0001/features.json    the feature contract on its own
+            v0001/flat/*.npy       forests only: FlatForest arrays, memory-mappable
+            v0001/metadata.json    timestamp, rows, holdout metrics, ...
+            v0002/...
+            LATEST                 name of the version to serve
+
+    A version folder is fully written before LATEST is switched to it (with an
+    atomic os.replace), so a reader never picks up a half-written model.
+    """
+
+    def __init__(self, root=REGISTRY_DIR, keep=5):
+        self.root = root
+        self.keep = keep
+        os.makedirs(root, exist_ok=True)
+
+    def versions(self):
+        # Oldest first, by number: v10000 comes after v9999
+        names = [
+            d for d in os.listdir(self.root)
+            if VERSION_PATTERN.match(d) and os.path.isdir(os.path.join(self.root, d))
+        ]
+        return sorted(names, key=lambda name: int(name[1:]))
+
+    def latest_version(self):
+        pointer = os.path.join(self.root, "LATEST")
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer, "r", encoding="utf-8") as file:
+            return file.read().strip() or None
+
+    def has_version(self, version):
+        """True for a published version; anything else (e.g. "../x") is never a path into the registry"""
+        return isinstance(version, str) and bool(VERSION_PATTERN.match(version)) and version in self.versions()
+
+    def _folder(self, version):
+        if not self.has_version(version):
+            raise ValueError(f"Unknown model version: {version!r}")
+        return os.path.join(self.root, version)
+
+    def metadata(self, version=None):
+        version = version or self.latest_version()
+        if version is None:
+            return None
+        with open(os.path.join(self._folder(version), "metadata.json"), "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def publish(self, model, features, metadata):
+        versions = self.versions()
+        version = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+
+        # Write everything into a hidden folder, then move it into place
+        tmp_dir = os.path.join(self.root, f".{version}.tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        joblib.dump({"model": model, "features": list(features)}, os.path.join(tmp_dir, "bundle.joblib"))
+        with open(os.path.join(tmp_dir, "features.json"), "w", encoding="utf-8") as file:
+            json.dump(list(features), file)
+        # Forests also get the memory-mappable flat copy
+        from sklearn.ensemble import RandomForestClassifier
+        if isinstance(model, RandomForestClassifier):
+            FlatForest.from_sklearn(model, features).save(os.path.join(tmp_dir, "flat"))
+
+        metadata = dict(metadata, version=version, published_at=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        with open(os.path.join(tmp_dir, "metadata.json"), "w", encoding="utf-8") as file:
+            json.dump(metadata, file, indent=2, default=str)
+
+        os.replace(tmp_dir, os.path.join(self.root, version))
+        self._point_to(version)
+        self._prune()
+        return version
+
+    def _point_to(self, version):
+        tmp_pointer = os.path.join(self.root, ".LATEST.tmp")
+        with open(tmp_pointer, "w", encoding="utf-8") as file:
+            file.write(version)
+        os.replace(tmp_pointer, os.path.join(self.root, "LATEST"))
+
+    def _prune(self):
+        # Keep the last few versions around for rollbacks
+        latest = self.latest_version()
+        for version in self.versions()[:-self.keep]:
+            if version != latest:
+                shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
+
+    def load(self, version=None, model_format="sklearn"):
+        """Loads a version (default: LATEST).
+
+        model_format="flat" memory-maps the FlatForest arrays instead of
+        unpickling the forest, when the version has them.
+        """
+        version = version or self.latest_version()
+        if version is None:
+            return None
+        folder = self._folder(version)
+
+        if model_format == "flat" and FlatForest.exists(os.path.join(folder, "flat")):
+            with open(os.path.join(folder, "features.json"), "r", encoding="utf-8") as file:
+                features = json.load(file)
+            model = FlatForest.load(os.path.join(folder, "flat"), features, mmap_mode="r")
+            return ModelBundle(version, model, features, self.metadata(version))
+
+        bundle = joblib.load(os.path.join(folder, "bundle.joblib"))
+        return ModelBundle(version, bundle["model"], bundle["features"], self.metadata(version))
+
+    def seed_from_legacy(self):
+        """Publishes the notebook model if the registry is still empty"""
+        if self.latest_version() is not None:
+            return None
+        if not (os.path.exists(LEGACY_MODEL_PATH) and os.path.exists(LEGACY_FEATURES_PATH)):
+            return None
+        return self.publish(
+            joblib.load(LEGACY_MODEL_PATH),
+            joblib.load(LEGACY_FEATURES_PATH),
+            {"mode": "notebook", "source": LEGACY_MODEL_PATH}
+        )
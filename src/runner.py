@@ -0,0 +1,151 @@
+"""Runs a Market in a background thread at a target rate.
+
+The dashboard used to advance the simulation one step per Streamlit rerun.
+Now the runner ticks the Market on its own thread, and the UI only polls
+snapshot() at its own refresh rate.
+
+A thread (not a process) is enough here: a step mostly waits on the
+pricing API, and the Market stays a plain in-memory object the dashboard
+can read.
+
+The thread outlives the dashboard session that started it, so the runner
+can be given an `alive()` check: once it has returned False for
+`grace_seconds` (a closed tab, not a reconnect), the runner stops and
+closes its Market on its own.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SimulationRunner:
+    def __init__(self, market, events_per_second=2.0, alive=None, grace_seconds=30.0):
+        self.market = market
+        self.events_per_second = events_per_second
+        self.alive = alive  # None: runs until stop()/close()
+        self.grace_seconds = grace_seconds
+        self.last_alive = time.monotonic()
+        self.closed = False
+
+        # Held for a whole step, and while a snapshot is copied
+        self.lock = threading.Lock()
+        self.running = threading.Event()  # set = ticking, clear = paused
+        self.stopped = False
+        self.wakeup = threading.Event()
+
+        self.steps = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.measured_rate = 0.0
+
+        self.thread = threading.Thread(target=self._loop, name="simulation-runner", daemon=True)
+        self.thread.start()
+
+    def resume(self):
+        self.running.set()
+        self.wakeup.set()
+
+    def pause(self):
+        self.running.clear()
+
+    def set_rate(self, events_per_second):
+        self.events_per_second = max(float(events_per_second), 0.1)
+        self.wakeup.set()
+
+    def stop(self):
+        self.stopped = True
+        self.running.set()  # let the loop see `stopped`
+        self.wakeup.set()
+        self.thread.join(timeout=5)
+
+    def close(self):
+        """Stops the thread and closes the Market (once)"""
+        self.stop()
+        self._close_market()
+
+    def _close_market(self):
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.market.close()
+
+    def _abandoned(self):
+        if self.alive is None:
+            return False
+        now = time.monotonic()
+        try:
+            if self.alive():
+                self.last_alive = now
+        except Exception as e:
+            logger.warning("Session check failed: %s", e)
+        return now - self.last_alive > self.grace_seconds
+
+    def _loop(self):
+        next_step = time.perf_counter()
+        window_start, window_steps = next_step, 0
+        while True:
+            # Wakes up every second even when paused, to notice an abandoned session
+            self.running.wait(timeout=1.0)
+            if self.stopped:
+                return
+            if self._abandoned():
+                logger.info("Dashboard session gone for %.0fs, stopping the simulation", self.grace_seconds)
+                self.stopped = True
+                self._close_market()
+                return
+            if not self.running.is_set():
+                continue
+
+            # Pace to the target rate; after a pause or a slow step, don't burst to catch up
+            now = time.perf_counter()
+            if next_step < now - 1.0:
+                next_step = now
+            if next_step > now:
+                self.wakeup.wait(next_step - now)
+                self.wakeup.clear()
+                continue  # re-check pause/stop/rate before stepping
+            next_step += 1.0 / self.events_per_second
+
+            try:
+                with self.lock:
+                    self.market.simulate_step()
+                    self.steps += 1
+            except Exception as e:
+                self.errors += 1
+                logger.exception("Simulation step failed: %s", e)
+
+            window_steps += 1
+            if now - window_start >= 1.0:
+                self.measured_rate = window_steps / (now - window_start)
+                window_start, window_steps = now, 0
+
+    def snapshot(self):
+        """A consistent copy of what the dashboard shows, taken between two steps"""
+        with self.lock:
+            market = self.market
+            products = [
+                {
+                    "name": p.name,
+                    "icon": p.icon,
+                    "price": p.price,
+                    "inventory": p.inventory,
+                    "sold_count": p.sold_count,
+                    "revenue": p.revenue
+                }
+                for p in market.products
+            ]
+            return {
+                "products": products,
+                "totals": market.products.totals(),
+                "logs": list(market.logs)[:30],
+                "accuracy": market.current_accuracy,
+                "transactions": market.recent_transactions(),
+                "stats": market.stats(),
+                "steps": self.steps,
+                "errors": self.errors,
+                "running": self.running.is_set(),
+                "target_rate": self.events_per_second,
+                "measured_rate": round(self.measured_rate, 1) if self.running.is_set() else 0.0
+            }
@@ -0,0 +1,275 @@
+"""Server-side retrain scheduling.
+
+Every /retrain call used to start its own full fit in the API's threads.
+Now they all go through one RetrainScheduler:
+
+- single flight: at most one training run at a time
+- coalescing: requests that arrive while a run is busy (or cooling down)
+  collapse into ONE pending run
+- min interval: consecutive runs start at least min_interval_seconds apart
+- training runs in a separate process (no GIL contention with /predict),
+  which can be cancelled, or killed after timeout_seconds; an in-thread run
+  (separate_process: false) is cancelled at its next check, before it publishes
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from src.config import configure_logging
+from src.metrics import TRAINING_BUCKETS, metrics
+
+logger = logging.getLogger(__name__)
+
+# The child imports src.* from here, wherever the API was started from
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _train_in_thread(should_stop=None):
+    from src.trainer import run_retraining
+    return run_retraining(should_stop)
+
+
+class RetrainScheduler:
+    def __init__(self, on_published=None, min_interval_seconds=60.0, timeout_seconds=1800.0, separate_process=True):
+        self.on_published = on_published  # called after a run published a new model (e.g. engine.load_model)
+        self.min_interval = min_interval_seconds
+        self.timeout = timeout_seconds
+        self.separate_process = separate_process
+
+        self.condition = threading.Condition()
+        self.pending = False
+        self.running = False
+        self.process = None
+        self.cancel_requested = False  # for the running run; checked before it starts a child or publishes
+        self.stopped = False
+
+        self.runs = 0
+        self.requests = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.last_started = None    # time.time()
+        self.last_finished = None
+        self.last_duration = None
+        self.last_outcome = None    # published / kept / no_data / failed / cancelled / timeout / reload_failed
+        self.last_report = None
+        self.last_error = None
+
+        self.worker = threading.Thread(target=self._loop, name="retrain-scheduler", daemon=True)
+        self.worker.start()
+
+    @classmethod
+    def from_settings(cls, retrain, on_published=None):
+        return cls(
+            on_published,
+            min_interval_seconds=retrain["min_interval_seconds"],
+            timeout_seconds=retrain["timeout_seconds"],
+            separate_process=retrain["separate_process"]
+        )
+
+    def request(self):
+        """Asks for a retrain. Returns "scheduled" or "coalesced" (one is already waiting)"""
+        with self.condition:
+            self.requests += 1
+            if self.pending:
+                self.coalesced += 1
+                return "coalesced"
+            self.pending = True
+            self.condition.notify()
+            return "scheduled"
+
+    def cancel(self):
+        """Drops the pending run and stops the running one. True if there was anything to cancel"""
+        with self.condition:
+            had_pending = self.pending
+            self.pending = False
+            # Still cancellable: not started its child yet, its child is alive, or it runs in-thread
+            process = self.process
+            stoppable = self.running and (process is None or process.poll() is None)
+            if stoppable:
+                self.cancel_requested = True
+                if process is not None:
+                    process.terminate()
+        return had_pending or stoppable
+
+    def shutdown(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.cancel()
+
+    def _wait_for_turn(self):
+        # Holds the condition: wait for a request, then for the min interval
+        while not self.stopped:
+            if not self.pending:
+                self.condition.wait()
+                continue
+            if self.last_started is not None:
+                wait = self.last_started + self.min_interval - time.time()
+                if wait > 0:
+                    self.condition.wait(wait)
+                    continue
+            return True
+        return False
+
+    def _loop(self):
+        while True:
+            with self.condition:
+                if not self._wait_for_turn():
+                    return
+                self.pending = False
+                self.running = True
+                self.cancel_requested = False
+                self.last_started = time.time()
+
+            logger.info("Background Task: Retraining initiated...")
+            outcome, report, error = self._run()
+
+            with self.condition:
+                self.running = False
+                self.process = None
+                self.runs += 1
+                self.last_finished = time.time()
+                self.last_duration = round(self.last_finished - self.last_started, 3)
+                self.last_outcome, self.last_report, self.last_error = outcome, report, error
+
+            # Per-stage times come back in the report (the child has its own registry)
+            metrics.histogram(
+                "trainer_run_seconds", "Retrain wall time, per outcome", {"outcome": outcome}, TRAINING_BUCKETS
+            ).observe(self.last_duration)
+            for stage, seconds in ((report or {}).get("stages_s") or {}).items():
+                metrics.histogram(
+                    "trainer_stage_seconds", "Retrain time per stage (load, fit, save)", {"stage": stage},
+                    TRAINING_BUCKETS
+                ).observe(seconds)
+
+            if outcome == "published":
+                logger.info("Reloading Model...")
+                try:
+                    if self.on_published is not None:
+                        self.on_published()
+                    logger.info("System Healed! New model is live.")
+                except Exception as e:
+                    # The model is in the registry but not live; the worker keeps serving requests
+                    logger.exception("Reloading the published model failed: %s", e)
+                    with self.condition:
+                        self.last_outcome = "reload_failed"
+                        self.last_error = repr(e)
+            elif outcome == "kept":
+                logger.info("Challenger did not beat the live model, keeping it.")
+            elif outcome == "no_data":
+                logger.warning("Retraining failed (insufficient data?)")
+            else:
+                logger.error("Retraining %s: %s", outcome, error)
+
+    def _run(self):
+        if not self.separate_process:
+            from src.trainer import RetrainCancelled
+            try:
+                return self._outcome(_train_in_thread(lambda: self.cancel_requested))
+            except RetrainCancelled:
+                with self.condition:
+                    self.cancelled += 1
+                return "cancelled", None, "cancelled before publishing"
+            except Exception as e:
+                return "failed", None, repr(e)
+
+        # A fresh interpreter (python -m src.scheduler), not multiprocessing:
+        # no fork of a threaded server, no re-import of whatever __main__ is
+        fd, result_path = tempfile.mkstemp(prefix="retrain-", suffix=".json")
+        os.close(fd)
+        try:
+            env = dict(os.environ)
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+            with self.condition:
+                # Started under the lock: a cancel() either lands before (no child) or sees the process
+                if self.cancel_requested:
+                    self.cancelled += 1
+                    return "cancelled", None, "cancelled before start"
+                self.process = subprocess.Popen(
+                    [sys.executable, "-m", "src.scheduler", "--report-to", result_path],
+                    cwd=os.getcwd(), env=env
+                )
+                process = self.process
+            try:
+                exitcode = process.wait(self.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                with self.condition:
+                    self.cancelled += 1
+                return "timeout", None, f"no result after {self.timeout}s"
+
+            if exitcode < 0:
+                with self.condition:
+                    self.cancelled += 1
+                return "cancelled", None, f"exit code {exitcode}"
+            with open(result_path, "r", encoding="utf-8") as file:
+                message = json.load(file) if os.path.getsize(result_path) else {"error": f"exit code {exitcode}"}
+        finally:
+            os.remove(result_path)
+
+        if "error" in message:
+            return "failed", None, message["error"]
+        return self._outcome(message["report"])
+
+    def _outcome(self, report):
+        if not report:
+            return "no_data", None, None
+        return ("published" if report["published"] else "kept"), report, None
+
+    def status(self):
+        with self.condition:
+            if self.running:
+                state = "running"
+            elif self.pending:
+                state = "waiting"
+            else:
+                state = "idle"
+            return {
+                "state": state,
+                "pending": self.pending,
+                "running_for_s": round(time.time() - self.last_started, 3) if self.running else None,
+                "runs": self.runs,
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "cancelled": self.cancelled,
+                "min_interval_s": self.min_interval,
+                "last_duration_s": self.last_duration,
+                "last_outcome": self.last_outcome
+            }
+
+    def last_run(self):
+        with self.condition:
+            return {
+                "started_at": self.last_started,
+                "finished_at": self.last_finished,
+                "duration_s": self.last_duration,
+                "outcome": self.last_outcome,
+                "report": self.last_report,
+                "error": self.last_error
+            }
+
+
+def main():
+    # Child side of a separate-process run: train, write the report, exit
+    parser = argparse.ArgumentParser(description="One retraining run (started by RetrainScheduler)")
+    parser.add_argument("--report-to", required=True)
+    args = parser.parse_args()
+    configure_logging()
+
+    try:
+        message = {"report": _train_in_thread()}
+    except Exception as e:
+        message = {"error": repr(e)}
+    with open(args.report_to, "w", encoding="utf-8") as file:
+        json.dump(message, file, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""How candidate prices are searched for the expected-revenue maximum.
+
+Every strategy works on a batch of N products at once: `evaluate` takes an
+(N, k) array of candidate prices and returns their (N, k) buy probabilities
+(one predict_proba call), so a strategy's cost is its number of calls and
+its evaluations per product. `budget` caps the evaluations, `max_calls` the
+calls: with the sklearn backend every call pays a fixed overhead of several
+ms, so the multi-step strategies only pay off with the flat backend (or a
+very large grid), where a call costs little more than its rows.
+
+    grid            k evenly spaced prices between the bounds (the original 20-point linspace)
+    coarse_to_fine  a coarse grid, then rounds of finer grids around the best price so far
+    golden          a coarse grid to bracket the best price, then golden-section search
+                    inside the bracket (one evaluation per product and call, the
+                    first two probes share a call)
+
+Candidates are rounded (cents or .x9 endings) BEFORE they are scored, so the
+returned price is always one the model actually evaluated.
+"""
+import numpy as np
+
+GOLDEN = (np.sqrt(5) - 1) / 2
+
+# Smallest useful step per rounding mode: refining below it only re-scores the same prices
+ROUNDING_STEP = {"none": 0.0, "cents": 0.01, "x9": 0.10}
+
+
+def round_prices(prices, rounding, low, high):
+    """Rounds an (N, k) array of prices, keeping them inside [low, high] per product"""
+    if rounding == "none":
+        return prices
+    if rounding == "cents":
+        return np.clip(np.round(prices, 2), np.round(low, 2)[:, None], np.round(high, 2)[:, None])
+    if rounding == "x9":
+        # Nearest price ending in 9 cents (1.49, 2.99, ...), stepped back inside the bounds.
+        # A range narrower than 10 cents may hold no such price: clip, the bounds win
+        rounded = np.round((prices - 0.09) * 10) / 10 + 0.09
+        rounded = np.where(rounded > high[:, None], rounded - 0.10, rounded)
+        rounded = np.where(rounded < low[:, None], rounded + 0.10, rounded)
+        return np.clip(np.round(rounded, 2), low[:, None], high[:, None])
+    raise ValueError(f"Unknown price rounding: {rounding}")
+
+
+class PriceSearch:
+    def __init__(self, strategy="grid", low=0.7, high=1.6, points=20, coarse_points=8, refine_points=4,
+                 budget=20, rounding="none", max_calls=4):
+        if strategy not in ("grid", "coarse_to_fine", "golden"):
+            raise ValueError(f"Unknown price search strategy: {strategy}")
+        self.strategy = strategy
+        self.low = low          # bounds, as multiples of the base price
+        self.high = high
+        self.points = points    # grid: number of candidates
+        self.coarse_points = coarse_points
+        self.refine_points = refine_points
+        self.budget = budget    # max model evaluations per product
+        self.rounding = rounding
+        self.max_calls = max(max_calls, 1)  # max predict_proba calls per search (grid always makes 1)
+
+    @classmethod
+    def from_settings(cls, search):
+        return cls(
+            strategy=search["strategy"],
+            low=search["low"],
+            high=search["high"],
+            points=search["points"],
+            coarse_points=search["coarse_points"],
+            refine_points=search["refine_points"],
+            budget=search["budget"],
+            rounding=search["rounding"],
+            max_calls=search["max_calls"]
+        )
+
+    def run(self, evaluate, base_prices):
+        """Returns the best price, its buy probability and expected revenue, per product"""
+        base_prices = np.asarray(base_prices, dtype=float)
+        low, high = base_prices * self.low, base_prices * self.high
+        best = Best(len(base_prices))
+        calls = [0]
+
+        def counted(candidates):
+            calls[0] += 1
+            return evaluate(candidates)
+
+        def score(candidates):
+            candidates = round_prices(candidates, self.rounding, low, high)
+            probs = counted(candidates)
+            best.update(candidates, probs)
+            return candidates, probs
+
+        if self.strategy == "grid":
+            score(np.linspace(low, high, min(self.points, self.budget), axis=1))
+        elif self.strategy == "coarse_to_fine":
+            self._coarse_to_fine(score, calls, best, low, high)
+        else:
+            self._golden(score, calls, best, low, high)
+
+        return best.price, best.prob, best.revenue
+
+    def _coarse(self, score, low, high):
+        coarse = max(1, min(self.coarse_points, self.budget))
+        if coarse == 1:
+            # A budget of one: the middle of the range, bracketed by the whole range
+            score(((low + high) / 2)[:, None])
+            return 1, (high - low) / 2
+        score(np.linspace(low, high, coarse, axis=1))
+        return coarse, (high - low) / (coarse - 1)
+
+    def _coarse_to_fine(self, score, calls, best, low, high):
+        used, step = self._coarse(score, low, high)
+        min_step = ROUNDING_STEP[self.rounding]
+        k = self.refine_points
+
+        # Each round: k points strictly inside (best - step, best + step)
+        while k > 0 and used + k <= self.budget and calls[0] < self.max_calls and step.max() > min_step:
+            offsets = np.linspace(-1, 1, k + 2)[1:-1]
+            candidates = best.price[:, None] + step[:, None] * offsets
+            score(np.clip(candidates, low[:, None], high[:, None]))
+            used += k
+            step = step * 2 / (k + 1)
+
+    def _golden(self, score, calls, best, low, high):
+        used, step = self._coarse(score, low, high)
+        a = np.maximum(best.price - step, low)
+        b = np.minimum(best.price + step, high)
+
+        def probe(x):
+            # One candidate per product, rounded like the rest; counts toward best
+            x, p = score(x[:, None])
+            return (x * p)[:, 0]
+
+        if used + 2 > self.budget or calls[0] >= self.max_calls:
+            return
+        c = b - GOLDEN * (b - a)
+        d = a + GOLDEN * (b - a)
+        # Both first probes in one call
+        x, p = score(np.stack([c, d], axis=1))
+        fc, fd = x[:, 0] * p[:, 0], x[:, 1] * p[:, 1]
+        used += 2
+
+        min_step = ROUNDING_STEP[self.rounding]
+        while used < self.budget and calls[0] < self.max_calls and (b - a).max() > max(min_step, 1e-4):
+            # Expected revenue is maximized: keep the side of the better probe
+            left = fc >= fd
+            b = np.where(left, d, b)
+            a = np.where(left, a, c)
+            new = np.where(left, b - GOLDEN * (b - a), a + GOLDEN * (b - a))
+            fnew = probe(new)
+            c, d = np.where(left, new, d), np.where(left, c, new)
+            fc, fd = np.where(left, fnew, fd), np.where(left, fc, fnew)
+            used += 1
+
+
+class Best:
+    """Running argmax of expected revenue over everything scored so far"""
+
+    def __init__(self, n):
+        self.price = np.zeros(n)
+        self.prob = np.zeros(n)
+        self.revenue = np.full(n, -np.inf)
+
+    def update(self, candidates, probs):
+        revenues = candidates * probs
+        i = np.argmax(revenues, axis=1)
+        rows = np.arange(len(candidates))
+        better = revenues[rows, i] > self.revenue
+        self.price = np.where(better, candidates[rows, i], self.price)
+        self.prob = np.where(better, probs[rows, i], self.prob)
+        self.revenue = np.where(better, revenues[rows, i], self.revenue)
+
+
+DEFAULT_SEARCH = PriceSearch()
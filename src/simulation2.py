@@ -1,3 +1,4 @@
+import math
 import random
 import numpy as np
 import pandas as pd
@@ -6,61 +7,338 @@ import datetime
 import joblib
 import faker
 import importlib
-import requests
+import logging
 
 from collections import deque
+from src.config import load_settings
+from src.metrics import metrics
+from src.pricing_client import make_pricing_client
+from src.sinks import make_sink
+from src.store import has_transactions, load_transactions
+
+logger = logging.getLogger(__name__)
 
 fake = faker.Faker()
 
+# What the dashboard charts need from each transaction
+RECENT_COLUMNS = ["timestamp", "product_name", "price_offered", "inventory_level"]
+
+# log-loss of a prediction of exactly 0 or 1 would be infinite
+EPS = 1e-6
+
+# Where a simulate_step spends its time (Market.stats())
+STEP = metrics.histogram("simulator_step_seconds", "One simulate_step")
+QUOTE_WAIT = metrics.histogram("simulator_quote_wait_seconds", "Waiting on a price quote")
+TRANSACTION_WRITE = metrics.histogram("simulator_transaction_write_seconds", "Handing a transaction to the sink")
+DRIFT_CHECK = metrics.histogram("simulator_drift_check_seconds", "Drift detector update + health check")
+
+
+class RollingWindow:
+    """Last `size` events with running sums: adding an event is O(1), no re-summing"""
+
+    def __init__(self, size):
+        self.size = size
+        self.events = deque()  # (correct, brier, log_loss)
+        self.correct = 0.0
+        self.brier = 0.0
+        self.log_loss = 0.0
+
+    def add(self, correct, brier, log_loss):
+        self.events.append((correct, brier, log_loss))
+        self.correct += correct
+        self.brier += brier
+        self.log_loss += log_loss
+        if len(self.events) > self.size:
+            old_correct, old_brier, old_log_loss = self.events.popleft()
+            self.correct -= old_correct
+            self.brier -= old_brier
+            self.log_loss -= old_log_loss
+
+    def add_many(self, correct, brier, log_loss):
+        if len(correct) >= self.size:
+            # The batch alone fills the window: rebuild from its tail
+            self.events = deque(zip(correct[-self.size:], brier[-self.size:], log_loss[-self.size:]))
+            self.correct = float(np.sum(correct[-self.size:]))
+            self.brier = float(np.sum(brier[-self.size:]))
+            self.log_loss = float(np.sum(log_loss[-self.size:]))
+            return
+        for event in zip(correct, brier, log_loss):
+            self.add(*event)
+
+    def __len__(self):
+        return len(self.events)
+
+    def metrics(self):
+        n = len(self.events)
+        if n == 0:
+            return {"events": 0, "accuracy": 1.0, "brier": 0.0, "log_loss": 0.0}
+        return {
+            "events": n,
+            "accuracy": self.correct / n,
+            "brier": self.brier / n,
+            "log_loss": self.log_loss / n
+        }
+
+
+class PageHinkley:
+    """Page-Hinkley test for an upward shift in the mean of a stream (here: the
+    per-event Brier error). O(1) state: count, mean, cumulative deviation and
+    its running minimum. Alarms when the deviation climbs `threshold` above
+    its minimum; `delta` is the size of change we tolerate as noise.
+    """
+
+    def __init__(self, delta=0.05, threshold=10.0, min_events=30):
+        self.delta = delta
+        self.threshold = threshold
+        self.min_events = min_events
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.cumulative = 0.0
+        self.minimum = 0.0
+
+    @property
+    def statistic(self):
+        return self.cumulative - self.minimum
+
+    @property
+    def alarm(self):
+        return self.n >= self.min_events and self.statistic > self.threshold
+
+    def add(self, x):
+        self.n += 1
+        self.mean += (x - self.mean) / self.n
+        self.cumulative += x - self.mean - self.delta
+        self.minimum = min(self.minimum, self.cumulative)
+
+    def add_many(self, x):
+        """Same recurrence for a whole batch, with cumsums. True if it alarmed anywhere in the batch"""
+        k = len(x)
+        if k == 0:
+            return False
+        counts = self.n + np.arange(1, k + 1)
+        means = (self.mean * self.n + np.cumsum(x)) / counts
+        cumulative = self.cumulative + np.cumsum(x - means - self.delta)
+        minimum = np.minimum(self.minimum, np.minimum.accumulate(cumulative))
+
+        alarmed = bool(np.any((cumulative - minimum > self.threshold) & (counts >= self.min_events)))
+        self.n = int(counts[-1])
+        self.mean = float(means[-1])
+        self.cumulative = float(cumulative[-1])
+        self.minimum = float(minimum[-1])
+        return alarmed
+
+
 class DriftDetector:
-    """The Observer: Tracks model performance in real-time"""
-    def __init__(self, window_size=50, threshold=0.50):
+    """The Observer: Tracks model performance in real-time.
+
+    Every event updates running counters in O(1): windowed accuracy, Brier
+    score and log-loss (calibration), globally and per product, plus a
+    Page-Hinkley test on the Brier error. Drift = the Page-Hinkley alarm, or
+    a full window whose accuracy fell below `threshold`.
+    """
+    def __init__(self, window_size=50, threshold=0.50, ph_delta=0.05, ph_threshold=10.0, min_events=30):
         self.window_size = window_size
         self.threshold = threshold
-        self.history = deque(maxlen=window_size) # Auto-removes old items
+        self.window = RollingWindow(window_size)
+        self.products = {}  # product name -> RollingWindow
+        self.page_hinkley = PageHinkley(ph_delta, ph_threshold, min_events)
+        self.ph_alarm = False
         self.drift_detected = False
 
-    def add_event(self, predicted_prob, actual_outcome):
+    @classmethod
+    def from_settings(cls, drift):
+        return cls(
+            window_size=drift["window_size"],
+            threshold=drift["accuracy_floor"],
+            ph_delta=drift["ph_delta"],
+            ph_threshold=drift["ph_threshold"],
+            min_events=drift["min_events"]
+        )
+
+    def reset(self):
+        # New model: start from a clean slate
+        self.window = RollingWindow(self.window_size)
+        self.products = {}
+        self.page_hinkley.reset()
+        self.ph_alarm = False
+        self.drift_detected = False
+
+    def product_window(self, product):
+        window = self.products.get(product)
+        if window is None:
+            window = self.products[product] = RollingWindow(self.window_size)
+        return window
+
+    def add_event(self, predicted_prob, actual_outcome, product=None):
         # We consider a "Prediction" to be Positive if prob > 0.5
         predicted_outcome = 1 if predicted_prob > 0.5 else 0
         
-        # Was the model correct? (True/False)
-        is_correct = (predicted_outcome == actual_outcome)
-        self.history.append(is_correct)
+        # Was the model correct? How far off / how surprised was it?
+        correct = 1.0 if predicted_outcome == actual_outcome else 0.0
+        brier = float(predicted_prob - actual_outcome) ** 2
+        p = min(max(predicted_prob, EPS), 1 - EPS)
+        log_loss = -math.log(p if actual_outcome else 1 - p)
+
+        self.window.add(correct, brier, log_loss)
+        if product is not None:
+            self.product_window(product).add(correct, brier, log_loss)
+        self.page_hinkley.add(brier)
+        self.ph_alarm = self.ph_alarm or self.page_hinkley.alarm
+
+    def add_events(self, predicted_probs, actual_outcomes, products=None):
+        """Bulk add_event, for the headless engine (products: array of names, optional)"""
+        probs = np.asarray(predicted_probs, dtype=float)
+        outcomes = np.asarray(actual_outcomes, dtype=float)
+        correct = ((probs > 0.5) == (outcomes == 1)).astype(float)
+        brier = (probs - outcomes) ** 2
+        p = np.clip(probs, EPS, 1 - EPS)
+        log_loss = -np.log(np.where(outcomes == 1, p, 1 - p))
+
+        self.window.add_many(correct, brier, log_loss)
+        if products is not None:
+            # Group in one pass: sort event indexes by product (stable, keeps event order
+            # within a product) and split at the product boundaries
+            names, inverse = np.unique(np.asarray(products), return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.cumsum(np.bincount(inverse, minlength=len(names)))[:-1]
+            for name, rows in zip(names, np.split(order, bounds)):
+                self.product_window(str(name)).add_many(correct[rows], brier[rows], log_loss[rows])
+        self.ph_alarm = self.page_hinkley.add_many(brier) or self.ph_alarm
 
     def check_health(self):
-        if len(self.history) < 10:
+        if len(self.window) < 10:
             return 1.0, False # Too early to tell, assume perfect health
         
-        # Calculate Accuracy (Sum of True / Total)
-        accuracy = sum(self.history) / len(self.history)
-        
-        # Check Drift
-        if accuracy < self.threshold:
-            self.drift_detected = True
-        else:
-            self.drift_detected = False
-            
+        accuracy = self.window.metrics()["accuracy"]
+        low_accuracy = len(self.window) >= self.window_size and accuracy < self.threshold
+        self.drift_detected = self.ph_alarm or low_accuracy
         return accuracy, self.drift_detected
 
+    def metrics(self):
+        return {
+            **self.window.metrics(),
+            "page_hinkley": self.page_hinkley.statistic,
+            "drift": self.drift_detected,
+            "products": {name: window.metrics() for name, window in self.products.items()}
+        }
+
+
+class Catalog:
+    """All product state as NumPy arrays, indexed by product id (struct of arrays).
+
+    Totals and bulk updates are vectorized; catalog[i] / iteration hand out
+    lightweight Product views for code that works one product at a time.
+    """
+
+    def __init__(self, products_config):
+        self.names = [p["name"] for p in products_config]
+        self.icons = [p.get("icon") for p in products_config]
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        self.base_price = np.array([p["base_price"] for p in products_config], dtype=float)
+        self.price = self.base_price.copy()
+        self.inventory = np.array([p["inventory"] for p in products_config], dtype=np.int64)
+        self.sold_count = np.zeros(len(self.names), dtype=np.int64)
+        self.revenue = np.zeros(len(self.names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.names)
+        if not 0 <= i < len(self.names):
+            raise IndexError(i)
+        return Product(self, i)
+
+    def __iter__(self):
+        return (Product(self, i) for i in range(len(self.names)))
+
+    def totals(self):
+        return {
+            "revenue": float(self.revenue.sum()),
+            "sold": int(self.sold_count.sum()),
+            "avg_inventory": float(self.inventory.mean()) if len(self.names) else 0.0
+        }
+
 
 class Product:
-    def __init__(self, name, base_price, inventory, icon):
-        self.name = name
-        self.base_price = base_price
-        self.price = base_price
-        self.inventory = inventory
-        self.icon = icon
-        self.sold_count = 0
-        self.revenue = 0.0
+    """A view on one row of the Catalog (no state of its own)"""
+    __slots__ = ("catalog", "id")
+
+    def __init__(self, catalog, product_id):
+        self.catalog = catalog
+        self.id = product_id
+
+    @property
+    def name(self):
+        return self.catalog.names[self.id]
+
+    @property
+    def icon(self):
+        return self.catalog.icons[self.id]
+
+    @property
+    def base_price(self):
+        return float(self.catalog.base_price[self.id])
+
+    @property
+    def price(self):
+        return float(self.catalog.price[self.id])
+
+    @price.setter
+    def price(self, value):
+        self.catalog.price[self.id] = value
+
+    @property
+    def inventory(self):
+        return int(self.catalog.inventory[self.id])
+
+    @inventory.setter
+    def inventory(self, value):
+        self.catalog.inventory[self.id] = value
+
+    @property
+    def sold_count(self):
+        return int(self.catalog.sold_count[self.id])
+
+    @sold_count.setter
+    def sold_count(self, value):
+        self.catalog.sold_count[self.id] = value
+
+    @property
+    def revenue(self):
+        return float(self.catalog.revenue[self.id])
+
+    @revenue.setter
+    def revenue(self, value):
+        self.catalog.revenue[self.id] = value
 
     def update_price(self, new_price):
         self.price = round(new_price, 2)
 
+
+# Shopper names come from a small pool drawn once, not a faker call per shopper
+SHOPPER_NAMES = []
+
+def shopper_names():
+    if not SHOPPER_NAMES:
+        SHOPPER_NAMES.extend(fake.first_name() for _ in range(256))
+    return SHOPPER_NAMES
+
+
 class Shopper:
-    def __init__(self):
-        self.name = fake.first_name()
-        self.budget_multiplier = np.random.normal(1.0, 0.25)
+    __slots__ = ("name", "budget_multiplier", "type")
+
+    def __init__(self, rng=None):
+        # rng: the Market's own numpy Generator, so seeded markets are reproducible
+        rng = rng if rng is not None else np.random.default_rng()
+        names = shopper_names()
+        self.name = names[rng.integers(len(names))]
+        self.budget_multiplier = rng.normal(1.0, 0.25)
         self.type = "Poor" if self.budget_multiplier < 0.9 else "Wealthy" if self.budget_multiplier > 1.1 else "Average"
 
     def decide(self, product):
@@ -76,20 +354,40 @@ class Shopper:
             return False, f"Too Expensive (Value: ${perceived_value:.2f})"
 
 class Market:
-    def __init__(self, products_config):
-        self.products = [Product(**p) for p in products_config]
-        self.logs = []
-        self.csv_path = "data/transactions2.csv"
-        self.drift_detector = DriftDetector()
+    def __init__(self, products_config, sink=None, api_url=None, seed=None, engine=None, scheduler=None,
+                 client=None):
+        self.products = Catalog(products_config)
+        self.logs = deque(maxlen=50) # newest first
+
+        # Each Market has its own random streams (seed=None -> fresh entropy),
+        # so independent replicas can run side by side and be replayed
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+
+        settings = load_settings()
+        self.api_url = (api_url or settings["simulation"]["api_url"]).rstrip("/")
+        # Remote API or an in-process PricingEngine (simulation.pricing_mode), unless one is handed in
+        self.client = client if client is not None else make_pricing_client(
+            settings["simulation"], self.api_url, engine, scheduler
+        )
+
+        # Transactions are buffered and written in bulk (see src/sinks.py)
+        storage = settings["storage"]
+        self.csv_path = storage["csv_path"]
+        self.sink = sink if sink is not None else make_sink(storage)
+        self.storage = storage
+
+        # The most recent transactions, in memory, for the dashboard charts
+        # (bounded: refresh cost doesn't grow with the store)
+        self.recent = deque(maxlen=settings["simulation"]["recent_transactions"])
+        self.drift_detector = DriftDetector.from_settings(settings["simulation"]["drift"])
         self.current_accuracy = 1.0
         self.last_retrain_time = datetime.datetime.min
         
         if not os.path.exists("data"):
             os.makedirs("data")
     def log(self, message):
-        self.logs.insert(0, message) 
-        if len(self.logs) > 50:
-            self.logs.pop()
+        self.logs.appendleft(message)
 
     def save_transaction(self, product, shopper, purchased):
         new_row = {
@@ -100,45 +398,74 @@ class Market:
             "budget_multiplier": round(shopper.budget_multiplier, 2),
             "purchased": 1 if purchased else 0
         }
-        df = pd.DataFrame([new_row])
-        if not os.path.exists(self.csv_path):
-            df.to_csv(self.csv_path, index=False)
-        else:
-            df.to_csv(self.csv_path, mode='a', header=False, index=False)
+        self.sink.write(new_row)
+        self.recent.append(new_row)
+
+    def save_transactions(self, rows):
+        # Bulk version, for the headless engine
+        self.sink.write_many(rows)
+        self.recent.extend(rows[-self.recent.maxlen:])
+
+    def load_recent(self):
+        """Seeds the recent-transactions buffer from the tail of the store (once, at startup)"""
+        self.sink.flush()
+        if not has_transactions(self.storage):
+            return
+        df = load_transactions(self.storage, columns=RECENT_COLUMNS, tail=self.recent.maxlen)
+        self.recent.extendleft(reversed(df.to_dict("records")))
+
+    def recent_transactions(self):
+        # Snapshot of the buffer as a DataFrame (copying a deque is atomic under the GIL)
+        return pd.DataFrame(list(self.recent), columns=RECENT_COLUMNS)
+
+    def close(self):
+        # Push out whatever is still buffered
+        self.sink.close()
+        self.client.close()
+
+    def stats(self):
+        """Step latencies, pricing client counters and drift state, for the dashboard"""
+        drift = self.drift_detector.metrics()
+        drift.pop("products")
+        return {
+            "latency": metrics.snapshot("simulator_"),
+            "client": self.client.stats(),
+            "drift": drift
+        }
 
     def get_optimal_price(self, product):
         """Phase 3 Client: Asks the API for the price"""
-        
-        # Define the API Payload
-        payload = {
-            "product_name": product.name,
-            "base_price": product.base_price,
-            "inventory_level": product.inventory
-        }
-        try:
-            # Send Request
-            response = requests.post("http://127.0.0.1:8000/predict", json=payload, timeout=2.0)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # --- DEBUG PRINT: START ---
-                # Checking if the API is actually "Thinking" or just acting like a dumb ass bitch
-                if data.get("model_active") is False:
-                    print(f" API is in DUMB MODE (Model not loaded). returning base price.")
-                else:
-                    print(f" API Response for {product.name}: ${data['optimal_price']} (Prob: {data['probability']:.2f})")
-                # --- DEBUG PRINT: END ---
-
-                return data["optimal_price"], data["probability"], data["expected_revenue"]
-            else:
-                print(f" API Error: {response.status_code}")
-                return product.base_price, 0, 0
-        
-        except Exception as e:
-            print(f" API Connection Error: {e}")
-            return product.base_price, 0, 0
-    
+        quote = self.client.quote(product.name, product.base_price, product.inventory)
+        return quote.price, quote.probability, quote.expected_revenue
+
+    def get_optimal_prices(self, products):
+        """Batch Client: Prices the given products with ONE call to /predict/batch"""
+        quotes = self.client.quote_many([(p.name, p.base_price, p.inventory) for p in products])
+        return [(q.price, q.probability, q.expected_revenue) for q in quotes]
+
+    def apply_price(self, product, new_price, prob, exp_rev):
+        # Only log/update if the AI actually moved the price
+        if abs(new_price - product.price) > 0.10:
+            direction = "📈 Raising" if new_price > product.price else "📉 Dropping"
+            self.log(f"🤖 **AI:** {direction} {product.name} to **€{new_price:.2f}**. Chance: {int(prob*100)}%. Exp.Rev: €{exp_rev:.2f}")
+            product.update_price(new_price)
+
+    def apply_prices(self, new_prices, probs, exp_revs):
+        """apply_price for the whole catalog at once (arrays indexed by product id)"""
+        catalog = self.products
+        new_prices = np.asarray(new_prices, dtype=float)
+        moved = np.flatnonzero(np.abs(new_prices - catalog.price) > 0.10)
+
+        # Only the newest messages fit in the log anyway
+        for i in moved[-self.logs.maxlen:].tolist():
+            direction = "📈 Raising" if new_prices[i] > catalog.price[i] else "📉 Dropping"
+            self.log(f"🤖 **AI:** {direction} {catalog.names[i]} to **€{new_prices[i]:.2f}**. Chance: {int(probs[i]*100)}%. Exp.Rev: €{exp_revs[i]:.2f}")
+        catalog.price[moved] = np.round(new_prices[moved], 2)
+
+    def reprice_catalog(self):
+        """Re-prices the whole catalog in a single API round trip"""
+        for p, (new_price, prob, exp_rev) in zip(self.products, self.get_optimal_prices(self.products)):
+            self.apply_price(p, new_price, prob, exp_rev)
 
     def trigger_healing(self):
         # Cooldown check: Only retrain once every 60 seconds
@@ -146,34 +473,54 @@ class Market:
         if (now - self.last_retrain_time).total_seconds() < 60:
             return
 
-        print("DRIFT DETECTED! Requesting Auto-Retrain...")
+        logger.warning("DRIFT DETECTED! Requesting Auto-Retrain...")
         try:
-            requests.post("http://127.0.0.1:8000/retrain", timeout=1.0)
+            self.client.retrain()
             self.last_retrain_time = now
             self.log("SYSTEM: Auto-Retraining triggered!")
             # Reset detector so we don't panic immediately again
-            self.drift_detector.history.clear() 
-        except:
-            print("Failed to contact API for retraining.")
+            self.drift_detector.reset()
+        except Exception as e:
+            logger.warning("Failed to contact API for retraining: %s", e)
 
     def simulate_step(self):
+        with STEP.time():
+            self._step()
+
+    def _step(self):
+        # Draw the whole step up front, so both API calls can be in flight together
+        shopper = product = None
+        if self.rng.random() < 0.7:
+            shopper = Shopper(self.np_rng)
+            product = self.rng.choice(self.products)
+        repriced = self.rng.choice(self.products) if self.rng.random() < 0.15 else None
+
+        shopper_call = reprice_call = None
+        if shopper is not None:
+            shopper_call = self.client.submit(product.name, product.base_price, product.inventory)
+        if repriced is not None and (product is None or repriced.id != product.id):
+            # (same product: wait, the shopper may change its inventory first)
+            reprice_call = self.client.submit(repriced.name, repriced.base_price, repriced.inventory)
+
         # 1. Shopper Event
-        if random.random() < 0.7: 
-            shopper = Shopper()
-            product = random.choice(self.products)
-            
+        if shopper is not None:
             # BEFORE DECISION: Ask API what it *thinks* will happen
             # We call the API just to get the 'probability' for the Drift Detector
-            # (In a real app, we would cache this from the pricing step)
-            _, predicted_prob, _ = self.get_optimal_price(product)
+            # (identical in-flight calls are coalesced by the client)
+            with QUOTE_WAIT.time():
+                expected = self.client.result(shopper_call, product.name, product.base_price)
             
             # REALITY: Shopper decides
             decision, reason = shopper.decide(product)
-            self.save_transaction(product, shopper, decision)
+            with TRANSACTION_WRITE.time():
+                self.save_transaction(product, shopper, decision)
             
             # --- NEW: FEED THE OBSERVER ---
-            self.drift_detector.add_event(predicted_prob, 1 if decision else 0)
-            acc, drift = self.drift_detector.check_health()
+            # Only real model answers: a stale/fallback quote says nothing about the model
+            with DRIFT_CHECK.time():
+                if expected.source == "api":
+                    self.drift_detector.add_event(expected.probability, 1 if decision else 0, product.name)
+                acc, drift = self.drift_detector.check_health()
             self.current_accuracy = acc # Save for UI
 
             # LOG DRIFT
@@ -191,11 +538,9 @@ class Market:
                     self.log(f"🚶 **WALK:** {shopper.name} left. {product.name} too high.")
 
         # 2. AI Re-pricing
-        if random.random() < 0.15:
-            p = random.choice(self.products)
-            new_price, prob, exp_rev = self.get_optimal_price(p)
-            
-            if abs(new_price - p.price) > 0.10:
-                direction = "📈 Raising" if new_price > p.price else "📉 Dropping"
-                self.log(f"🤖 **AI:** {direction} {p.name} to **€{new_price:.2f}**. Chance: {int(prob*100)}%. Exp.Rev: €{exp_rev:.2f}")
-                p.update_price(new_price)   
\ No newline at end of file
+        if repriced is not None:
+            if reprice_call is None:
+                reprice_call = self.client.submit(repriced.name, repriced.base_price, repriced.inventory)
+            with QUOTE_WAIT.time():
+                new_price, prob, exp_rev, _ = self.client.result(reprice_call, repriced.name, repriced.base_price)
+            self.apply_price(repriced, new_price, prob, exp_rev)   
\ No newline at end of file
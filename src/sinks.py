@@ -0,0 +1,296 @@
+import atexit
+import csv
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+# Column order of data/transactions2.csv
+TRANSACTION_COLUMNS = [
+    "timestamp",
+    "product_name",
+    "price_offered",
+    "inventory_level",
+    "budget_multiplier",
+    "purchased"
+]
+
+
+class CsvBackend:
+    """Appends rows to one CSV file, one open/close per flush instead of per event"""
+
+    def __init__(self, path):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+    def write_rows(self, rows):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=TRANSACTION_COLUMNS)
+            if new_file:
+                writer.writeheader()
+            writer.writerows(rows)
+
+    def close(self):
+        pass
+
+
+def _file_key(name):
+    # part-<ns>-<seq>.parquet / compact-<ns>-<seq>.parquet -> (ns, seq)
+    _, ns, seq = name[:-len(".parquet")].split("-")
+    return int(ns), int(seq)
+
+
+def live_files(folder):
+    """The files of one parquet partition a reader should see, oldest first.
+
+    compact-<key> holds every file up to and including <key>, so whatever it
+    covers is left out even while it is still on disk. Compaction renames the
+    merged file in first and deletes its inputs after; a reader listing the
+    folder at any point in between sees each row exactly once.
+    """
+    names = [f for f in os.listdir(folder) if f.endswith(".parquet") and not f.startswith(".")]
+    compacts = [f for f in names if f.startswith("compact-")]
+    if not compacts:
+        return sorted(names, key=_file_key)
+    newest = max(compacts, key=_file_key)
+    covered = _file_key(newest)
+    return [newest] + sorted((f for f in names if f.startswith("part-") and _file_key(f) > covered), key=_file_key)
+
+
+class ParquetBackend:
+    """Columnar store: one folder per day and product, e.g.
+
+        data/transactions/date=2026-01-17/product=Milk/part-<ns>.parquet
+
+    Readers (src/store.py) can then skip whole days/products and only decode the
+    columns they need, instead of re-parsing the whole CSV history as text.
+    Every flush adds a small file per touched partition; once a partition has
+    `compact_min_files` of them they are merged into one.
+    """
+
+    def __init__(self, root, compact_min_files=16):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("The parquet storage backend needs pyarrow: pip install pyarrow")
+
+        self.pa = pa
+        self.pq = pq
+        self.root = root
+        self.compact_min_files = compact_min_files
+        self.schema = pa.schema([
+            ("timestamp", pa.string()),
+            ("product_name", pa.string()),
+            ("price_offered", pa.float64()),
+            ("inventory_level", pa.int64()),
+            ("budget_multiplier", pa.float64()),
+            ("purchased", pa.int64())
+        ])
+        self._touched = set()
+        self._seq = itertools.count()  # time_ns alone can repeat on coarse clocks
+        os.makedirs(root, exist_ok=True)
+
+    def partition_dir(self, day, product_name):
+        # product names are URI-encoded, that's what hive partitioning decodes
+        return os.path.join(self.root, f"date={day}", f"product={quote(product_name, safe='')}")
+
+    def write_rows(self, rows):
+        groups = defaultdict(list)
+        for row in rows:
+            groups[(row["timestamp"][:10], row["product_name"])].append(row)
+
+        for (day, product_name), group in groups.items():
+            folder = self.partition_dir(day, product_name)
+            os.makedirs(folder, exist_ok=True)
+            table = self.pa.Table.from_pylist(group, schema=self.schema)
+            self.pq.write_table(table, os.path.join(folder, self._part_name()))
+            self._touched.add(folder)
+
+            if len(live_files(folder)) >= self.compact_min_files:
+                self.compact(folder)
+
+    def _part_name(self):
+        return f"part-{time.time_ns()}-{next(self._seq):06d}.parquet"
+
+    def compact(self, folder):
+        """Merges the live files of one partition into a single compact-<key> file"""
+        files = live_files(folder)
+        if len(files) < 2:
+            return
+
+        table = self.pa.concat_tables([self.pq.read_table(os.path.join(folder, f), schema=self.schema) for f in files])
+        ns, seq = max(_file_key(f) for f in files)
+        name = f"compact-{ns}-{seq:06d}.parquet"
+
+        # Write under a hidden name first (readers skip dot-files), then publish it:
+        # from the rename on, live_files() resolves to it and ignores what it covers
+        tmp_path = os.path.join(folder, f".compact-{time.time_ns()}.parquet")
+        self.pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(folder, name))
+
+        for f in os.listdir(folder):
+            if f != name and f.endswith(".parquet") and not f.startswith(".") and _file_key(f) <= (ns, seq):
+                os.remove(os.path.join(folder, f))
+
+    def close(self):
+        # Leave every partition we wrote to as a single file
+        for folder in self._touched:
+            self.compact(folder)
+        self._touched.clear()
+
+
+class TransactionSink:
+    """Buffers transaction rows in memory and hands them to a backend in bulk.
+
+    A flush happens when `flush_rows` rows are waiting or `flush_interval`
+    seconds have passed, whichever comes first, and once more on close/exit.
+    With `background=True` the flushing runs on a daemon thread, so the
+    simulation loop only ever appends to a list. The buffer is bounded: if the
+    backend falls behind and `max_buffer_rows` is reached, write() flushes
+    inline (backpressure) rather than dropping transactions.
+    """
+
+    def __init__(self, backend, flush_rows=256, flush_interval=1.0, max_buffer_rows=10000, background=True):
+        self.backend = backend
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_buffer_rows = max(max_buffer_rows, flush_rows)
+
+        self._buffer = []
+        self._lock = threading.Lock()        # guards _buffer
+        self._write_lock = threading.Lock()  # one backend write at a time, in order
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._last_flush = time.monotonic()
+
+        self.rows_written = 0
+        self.flushes = 0
+
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name="transaction-sink", daemon=True)
+            self._thread.start()
+
+        # Unregistered again in close(): the handler holds a reference to the sink
+        atexit.register(self.close)
+
+    def write(self, row):
+        with self._lock:
+            self._buffer.append(row)
+            pending = len(self._buffer)
+        self._after_append(pending)
+
+    def write_many(self, rows):
+        with self._lock:
+            self._buffer.extend(rows)
+            pending = len(self._buffer)
+        self._after_append(pending)
+
+    def _after_append(self, pending):
+        if self._thread is None or self._closed:
+            # Foreground mode: the caller pays for the flush when one is due
+            if pending >= self.flush_rows or self._flush_due():
+                self.flush()
+        elif pending >= self.max_buffer_rows:
+            self.flush()
+        elif pending >= self.flush_rows:
+            self._wakeup.set()
+
+    def _flush_due(self):
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush(self):
+        # Take the rows out under the buffer lock, write them outside it,
+        # so producers never wait on the disk
+        with self._write_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            if rows:
+                try:
+                    self.backend.write_rows(rows)
+                except Exception:
+                    # Put them back in front of anything written meanwhile, the next flush retries
+                    with self._lock:
+                        self._buffer[:0] = rows
+                    raise
+                self.rows_written += len(rows)
+                self.flushes += 1
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(timeout=self.flush_interval)
+            self._wakeup.clear()
+            if self._closed:
+                break
+
+            with self._lock:
+                pending = len(self._buffer)
+            if pending >= self.flush_rows or (pending and self._flush_due()):
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.exception("Transaction flush failed: %s", e)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        self.flush()
+        self.backend.close()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._buffer)
+        return {"pending": pending, "rows_written": self.rows_written, "flushes": self.flushes}
+
+
+class NullSink:
+    """Same interface as TransactionSink, keeps nothing (backtests, benchmarks)"""
+
+    def write(self, row):
+        pass
+
+    def write_many(self, rows):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {"pending": 0, "rows_written": 0, "flushes": 0}
+
+
+def make_backend(storage_settings):
+    backend = storage_settings["backend"]
+    if backend == "csv":
+        return CsvBackend(storage_settings["csv_path"])
+    if backend == "parquet":
+        return ParquetBackend(storage_settings["parquet_path"], storage_settings["compact_min_files"])
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def make_sink(storage_settings):
+    return TransactionSink(
+        make_backend(storage_settings),
+        flush_rows=storage_settings["flush_rows"],
+        flush_interval=storage_settings["flush_interval_seconds"],
+        max_buffer_rows=storage_settings["max_buffer_rows"],
+        background=storage_settings["background"]
+    )
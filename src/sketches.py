@@ -0,0 +1,186 @@
+"""Input-distribution drift: streaming histograms of what the API is asked to
+price, compared with what the served model was trained for.
+
+At publish time the trainer stores a reference profile in the model's
+metadata, per product and monitored input:
+
+    inventory_level  decile bin edges and counts of the training rows
+    base_price       the catalog base price at training time, as a band of
+                     +-BASE_PRICE_TOLERANCE (training rows have no base_price)
+
+The API then counts the request inputs into the SAME bins (fixed memory, one
+searchsorted per value) and reports PSI and a binned KS distance per product
+and input. The price the API hands back is its own output, not an input, so
+it is not monitored: its distribution never matches training's price_offered.
+"""
+import os
+import threading
+
+import numpy as np
+import yaml
+
+# A request's base price within +-5% of the training catalog's counts as unchanged
+BASE_PRICE_TOLERANCE = 0.05
+
+# Rule-of-thumb PSI levels
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+
+def reference_profile(df, bins=10, base_prices=None):
+    """Per product and input: bin edges and the training counts in them.
+
+    base_prices: {product: catalog base price} at training time; products
+    without one get no base_price reference.
+    """
+    base_prices = base_prices or {}
+    profile = {}
+    for product, rows in df.groupby("product_name"):
+        values = rows["inventory_level"].to_numpy(dtype=float)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        profile[product] = {"inventory_level": {"edges": edges.tolist(), "counts": counts.tolist()}}
+
+        if product in base_prices:
+            base = float(base_prices[product])
+            profile[product]["base_price"] = {
+                "edges": [base * (1 - BASE_PRICE_TOLERANCE), base * (1 + BASE_PRICE_TOLERANCE)],
+                "counts": [0, len(rows), 0]
+            }
+    return profile
+
+
+def extend_profile(profile, df, bins=10, base_prices=None):
+    """Adds df's rows to an existing reference profile, in its own bins.
+
+    For an incrementally updated model: the reference then covers every row
+    it learned, not just the latest batch. Products new to the profile get
+    a fresh one from df.
+    """
+    profile = {product: {feature: dict(ref) for feature, ref in features.items()} for product, features in profile.items()}
+    fresh = []
+    for product, rows in df.groupby("product_name"):
+        if product not in profile:
+            fresh.append(product)
+            continue
+        for feature, ref in profile[product].items():
+            if feature == "base_price":
+                counts = np.array(ref["counts"])
+                counts[1] += len(rows)
+            elif feature in rows:
+                values = rows[feature].to_numpy(dtype=float)
+                counts = np.asarray(ref["counts"]) + np.bincount(
+                    np.searchsorted(ref["edges"], values, side="right"), minlength=len(ref["edges"]) + 1
+                )
+            else:
+                continue
+            ref["counts"] = counts.tolist()
+    if fresh:
+        profile.update(reference_profile(df[df["product_name"].isin(fresh)], bins, base_prices))
+    return profile
+
+
+def catalog_base_prices(path):
+    """{product: base_price} from a products.yaml catalog ({} if there is none)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        products = yaml.safe_load(file)["products"]
+    return {p["name"]: p["base_price"] for p in products}
+
+
+def psi(expected, actual, eps=1e-4):
+    """Population Stability Index between two count vectors over the same bins"""
+    e = np.maximum(np.asarray(expected, dtype=float) / max(np.sum(expected), 1), eps)
+    a = np.maximum(np.asarray(actual, dtype=float) / max(np.sum(actual), 1), eps)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def ks(expected, actual):
+    """Kolmogorov-Smirnov distance, on the binned CDFs"""
+    e = np.cumsum(expected) / max(np.sum(expected), 1)
+    a = np.cumsum(actual) / max(np.sum(actual), 1)
+    return float(np.max(np.abs(a - e)))
+
+
+class StreamingHistogram:
+    """Counts over fixed bin edges. Memory is fixed at len(edges) + 1 counters;
+    once `max_count` values are in, all counts are halved, so old traffic
+    fades out and the histogram tracks the recent distribution.
+    """
+
+    def __init__(self, edges, max_count=5000):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) + 1)
+        self.max_count = max_count
+        self.total = 0.0
+
+    def add(self, value):
+        self.counts[np.searchsorted(self.edges, value, side="right")] += 1
+        self.total += 1
+        if self.total >= self.max_count:
+            self.counts *= 0.5
+            self.total *= 0.5
+
+
+class InputMonitor:
+    """Traffic histograms for one served model, keyed like its reference profile"""
+
+    def __init__(self, reference, max_count=5000, min_count=50):
+        self.reference = reference
+        self.min_count = min_count
+        self.lock = threading.Lock()
+        self.histograms = {
+            product: {feature: StreamingHistogram(ref["edges"], max_count) for feature, ref in features.items()}
+            for product, features in reference.items()
+        }
+        self.unknown_products = 0
+
+    @classmethod
+    def from_metadata(cls, metadata, settings):
+        reference = (metadata or {}).get("input_reference")
+        if not settings["enabled"] or not reference:
+            return None
+        return cls(reference, settings["max_count"], settings["min_count"])
+
+    def observe(self, product_name, base_price, inventory_level):
+        histograms = self.histograms.get(product_name)
+        with self.lock:
+            if histograms is None:
+                self.unknown_products += 1
+                return
+            for feature, value in (("inventory_level", inventory_level), ("base_price", base_price)):
+                if feature in histograms:
+                    histograms[feature].add(value)
+
+    def report(self):
+        products = {}
+        worst = 0.0
+        scored = 0
+        with self.lock:
+            for product, features in self.histograms.items():
+                products[product] = {}
+                for feature, histogram in features.items():
+                    reference = self.reference[product][feature]["counts"]
+                    if histogram.total < self.min_count:
+                        products[product][feature] = {"observed": round(histogram.total), "psi": None, "ks": None}
+                        continue
+                    score = psi(reference, histogram.counts)
+                    worst = max(worst, score)
+                    scored += 1
+                    products[product][feature] = {
+                        "observed": round(histogram.total),
+                        "psi": round(score, 4),
+                        "ks": round(ks(reference, histogram.counts), 4)
+                    }
+            unknown = self.unknown_products
+
+        if scored == 0:
+            status = "warming_up"
+        elif worst >= PSI_SIGNIFICANT:
+            status = "significant"
+        elif worst >= PSI_MODERATE:
+            status = "moderate"
+        else:
+            status = "stable"
+        return {"status": status, "max_psi": round(worst, 4), "unknown_products": unknown, "products": products}
@@ -0,0 +1,131 @@
+import os
+import datetime
+import shutil
+from urllib.parse import unquote
+
+import pandas as pd
+
+from src.sinks import TRANSACTION_COLUMNS, live_files
+
+# A compaction can delete a part file between listing and reading it: list again
+READ_RETRIES = 3
+
+
+def has_transactions(storage):
+    if storage["backend"] == "parquet":
+        root = storage["parquet_path"]
+        return os.path.isdir(root) and any(d.startswith("date=") for d in os.listdir(root))
+    return os.path.exists(storage["csv_path"])
+
+
+def clear_transactions(storage):
+    """Deletes every stored transaction of the configured backend (dashboard reset)"""
+    if storage["backend"] == "parquet":
+        shutil.rmtree(storage["parquet_path"], ignore_errors=True)
+    elif os.path.exists(storage["csv_path"]):
+        os.remove(storage["csv_path"])
+
+
+def load_transactions(storage, columns=None, since=None, products=None, tail=None):
+    """Reads transactions from whichever backend the simulator writes to.
+
+    columns:  only these columns (default: all)
+    since:    datetime / "YYYY-MM-DD HH:MM:SS" string, keep rows at or after it
+    products: only these product names
+    tail:     only the last N rows (by timestamp)
+
+    With the parquet backend the day/product folders that can't match are never
+    opened and only the requested columns are decoded.
+    """
+    columns = list(columns) if columns else list(TRANSACTION_COLUMNS)
+    if isinstance(since, datetime.datetime):
+        since = since.strftime("%Y-%m-%d %H:%M:%S")
+
+    if storage["backend"] == "parquet":
+        df = _load_parquet(storage["parquet_path"], columns, since, products, tail)
+    else:
+        df = _load_csv(storage["csv_path"], columns, since, products)
+
+    if tail is not None:
+        df = df.tail(tail)
+    return df.reset_index(drop=True)
+
+
+def _load_csv(path, columns, since, products):
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=columns)
+
+    # Filter columns have to be read even when the caller doesn't want them back
+    needed = set(columns)
+    if since is not None:
+        needed.add("timestamp")
+    if products is not None:
+        needed.add("product_name")
+
+    df = pd.read_csv(path, usecols=[c for c in TRANSACTION_COLUMNS if c in needed])
+    if since is not None:
+        df = df[df["timestamp"] >= since]
+    if products is not None:
+        df = df[df["product_name"].isin(list(products))]
+    return df[columns]
+
+
+def _load_parquet(root, columns, since, products, tail):
+    if not has_transactions({"backend": "parquet", "parquet_path": root}):
+        return pd.DataFrame(columns=columns)
+
+    for attempt in range(READ_RETRIES):
+        try:
+            return _read_parquet(root, columns, since, products, tail)
+        except FileNotFoundError:
+            if attempt == READ_RETRIES - 1:
+                raise
+
+
+def _dataset(root, days, products):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    # Partition pruning: whole day/product folders are skipped, and each
+    # partition contributes only its live files (see sinks.live_files)
+    files = []
+    for day in days:
+        day_dir = os.path.join(root, f"date={day}")
+        for product_dir in sorted(os.listdir(day_dir)):
+            if products is not None and unquote(product_dir[len("product="):]) not in products:
+                continue
+            folder = os.path.join(day_dir, product_dir)
+            files.extend(os.path.join(folder, f) for f in live_files(folder))
+
+    partitioning = ds.partitioning(pa.schema([("date", pa.string()), ("product", pa.string())]), flavor="hive")
+    return ds.dataset(files, format="parquet", partitioning=partitioning, partition_base_dir=root)
+
+
+def _read_parquet(root, columns, since, products, tail):
+    import pyarrow.dataset as ds
+
+    days = sorted(d[len("date="):] for d in os.listdir(root) if d.startswith("date="))
+    condition = None
+    if since is not None:
+        days = [day for day in days if day >= since[:10]]
+        condition = ds.field("timestamp") >= since
+    products = set(products) if products is not None else None
+
+    # Need the timestamp to put the product partitions back into time order
+    read_cols = list(dict.fromkeys(columns + ["timestamp"]))
+
+    if tail is None:
+        df = _dataset(root, days, products).to_table(columns=read_cols, filter=condition).to_pandas()
+    else:
+        # Newest days first, stop as soon as we have enough rows
+        frames, rows = [], 0
+        for day in reversed(days):
+            frame = _dataset(root, [day], products).to_table(columns=read_cols, filter=condition).to_pandas()
+            frames.insert(0, frame)
+            rows += len(frame)
+            if rows >= tail:
+                break
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=read_cols)
+
+    df = df.sort_values("timestamp", kind="stable")
+    return df[columns]
@@ -0,0 +1,70 @@
+import numpy as np
+import yaml
+
+
+class PriceSurface:
+    """Precomputed answer table of /predict for a fixed catalog.
+
+    The catalog (configs/products.yaml) and the inventory range are small and
+    bounded, so at model-load time we score every product x inventory level x
+    candidate price in ONE batched inference and keep the winners in a
+    (products, inventory levels) NumPy table. A request is then an array lookup.
+    Anything outside the table (unknown product, other base price, inventory
+    out of range) returns None and goes through live inference.
+    """
+
+    def __init__(self, product_names, base_prices, max_inventory, score_grid):
+        self.max_inventory = int(max_inventory)
+        self.levels = self.max_inventory + 1
+
+        # product -> (row in the table, base price the row was computed for)
+        self.index = {name: (row, float(bp)) for row, (name, bp) in enumerate(zip(product_names, base_prices))}
+
+        # One row per (product, inventory level), product-major
+        n_products = len(product_names)
+        names = np.repeat(product_names, self.levels)
+        prices = np.repeat(np.asarray(base_prices, dtype=float), self.levels)
+        inventories = np.tile(np.arange(self.levels), n_products)
+
+        optimal, probs, revenues = score_grid(names, prices, inventories)
+
+        # table[row, inventory] = (optimal_price, probability, expected_revenue)
+        self.table = np.stack([optimal, probs, revenues], axis=1).reshape(n_products, self.levels, 3)
+
+        self.hits = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_catalog(cls, catalog_path, max_inventory, score_grid):
+        with open(catalog_path, "r", encoding="utf-8") as file:
+            products = yaml.safe_load(file)["products"]
+        return cls(
+            [p["name"] for p in products],
+            [p["base_price"] for p in products],
+            max_inventory,
+            score_grid
+        )
+
+    def lookup(self, product_name, base_price, inventory_level):
+        entry = self.index.get(product_name)
+        if entry is None or entry[1] != base_price or not 0 <= inventory_level <= self.max_inventory:
+            self.fallbacks += 1
+            return None
+
+        self.hits += 1
+        optimal, prob, revenue = self.table[entry[0], inventory_level]
+        return {
+            "optimal_price": float(optimal),
+            "probability": float(prob),
+            "expected_revenue": float(revenue),
+            "model_active": True
+        }
+
+    def stats(self):
+        return {
+            "products": len(self.index),
+            "inventory_levels": self.levels,
+            "bytes": int(self.table.nbytes),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks
+        }
@@ -1,56 +1,423 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
-import joblib
-import os
-
-def run_retraining():
-    print("♻️  TRAINING STARTED: Loading data...")
-    
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import accuracy_score, brier_score_loss, log_loss
+from sklearn.utils.class_weight import compute_sample_weight
+from joblib import Parallel, delayed
+import copy
+import logging
+import time
+from src.config import load_settings
+from src.store import has_transactions, load_transactions
+from src.registry import ModelRegistry
+from src.metrics import StageTimer
+from src.sketches import catalog_base_prices, extend_profile, reference_profile
+
+logger = logging.getLogger(__name__)
+
+# The trainer only needs these, the parquet store won't even decode the rest
+TRAINING_COLUMNS = ["timestamp", "product_name", "price_offered", "inventory_level", "purchased"]
+
+# Models are published to (and the current one read from) the registry the API serves from.
+# Created on first use, so importing the trainer doesn't create models/registry
+_registry = None
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
+
+
+class RetrainCancelled(Exception):
+    """The scheduler cancelled an in-thread run (raised before anything is published)"""
+
+
+def check_cancelled(should_stop):
+    if should_stop is not None and should_stop():
+        raise RetrainCancelled()
+
+
+class IncrementalSGDModel:
+    """Logistic-regression model that can learn from new rows only (partial_fit).
+
+    Same contract as the forest: takes the feature_cols matrix, exposes
+    predict / predict_proba, so the API doesn't care which one it serves.
+    """
+
+    def __init__(self, feature_cols):
+        self.feature_names_in_ = np.array(feature_cols, dtype=object)
+        self.classes_ = np.array([0, 1])
+        self.scaler = StandardScaler()
+        self.model = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)
+
+    def partial_fit(self, X, y):
+        X = np.asarray(X, dtype=float)
+        self.scaler.partial_fit(X)
+        # class_weight="balanced" isn't supported by partial_fit, so weigh the batch instead
+        self.model.partial_fit(
+            self.scaler.transform(X), y,
+            classes=self.classes_,
+            sample_weight=compute_sample_weight("balanced", y)
+        )
+        return self
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self.scaler.transform(np.asarray(X, dtype=float)))
+
+    def predict(self, X):
+        return self.model.predict(self.scaler.transform(np.asarray(X, dtype=float)))
+
+
+def clean(df):
+    df = df.dropna()
+    df = df[df['purchased'].isin([0, 1])]
+    df = df[df['inventory_level'] > 0]
+    return df
+
+
+def encode(df, feature_cols):
+    # One-Hot, laid out exactly like feature_cols (missing products -> all 0)
+    df_encoded = pd.get_dummies(df, columns=['product_name'], drop_first=False)
+    X = df_encoded.reindex(columns=feature_cols, fill_value=0).astype(float)
+    y = df_encoded['purchased'].astype(int)
+    return X, y
+
+
+def read_state():
+    # High-water mark of what the current model has already seen (kept in its metadata)
+    metadata = get_registry().metadata()
+    if metadata is None or "watermark" not in metadata:
+        return None
+    return {
+        "watermark": metadata["watermark"],
+        # Rows per product at exactly the watermark's second that were learned
+        "watermark_rows": metadata["watermark_rows"],
+        "rows_processed": metadata["rows_processed"],
+        "input_reference": metadata.get("input_reference")
+    }
+
+
+def after_watermark(df, state):
+    """Cleaned rows the current model hasn't learned yet.
+
+    Timestamps only have one-second resolution (and a headless tick stamps
+    many rows with one), so rows sharing the watermark's second can arrive
+    after the model was published: of those, the first watermark_rows[product]
+    (in store order) were learned, the rest are new.
+    """
+    newer = df['timestamp'] > state["watermark"]
+    at = df['timestamp'] == state["watermark"]
+    learned = df.loc[at, 'product_name'].map(state["watermark_rows"]).fillna(0)
+    position = df[at].groupby('product_name').cumcount()
+    keep = newer.copy()
+    keep[at] = position >= learned
+    return df[keep]
+
+
+def watermark_of(df, state=None):
+    """(watermark, rows per product at it) after learning df on top of `state`"""
+    watermark = str(df['timestamp'].max())
+    counts = df.loc[df['timestamp'] == watermark, 'product_name'].value_counts()
+    rows = {product: int(n) for product, n in counts.items()}
+    if state is not None and state["watermark"] == watermark:
+        for product, n in state["watermark_rows"].items():
+            rows[product] = rows.get(product, 0) + n
+    return watermark, rows
+
+
+def publish(model, feature_cols, df, rows_processed, report, state=None):
+    """Model + features + metadata land in the registry as one new version.
+
+    df: the rows the model learned in this run. state: read_state() of the
+    model it was updated from (incremental), whose watermark and input
+    reference it extends.
+    """
+    if isinstance(model, RandomForestClassifier):
+        # Serving scores ~20 rows per call: a joblib pool per predict_proba only costs
+        model.set_params(n_jobs=None)
+    trainer = load_settings()["trainer"]
+    base_prices = catalog_base_prices(trainer["catalog_path"])
+
+    # What the model represents, for the API's input drift monitor: an update
+    # adds its rows to the previous model's reference
+    previous = state["input_reference"] if state is not None else None
+    if previous:
+        reference = extend_profile(previous, df, trainer["reference_bins"], base_prices)
+    else:
+        reference = reference_profile(df, trainer["reference_bins"], base_prices)
+
+    watermark, watermark_rows = watermark_of(df, state)
+    metadata = dict(
+        report,
+        watermark=watermark,
+        watermark_rows=watermark_rows,
+        rows_processed=int(rows_processed),
+        n_features=len(feature_cols),
+        input_reference=reference
+    )
+    version = get_registry().publish(model, feature_cols, metadata)
+    report["version"] = version
+    logger.info("Published model %s to the registry.", version)
+
+
+def time_split(df, holdout_fraction):
+    # Time-based holdout: train on the past, score on the most recent rows
+    df = df.sort_values('timestamp', kind='stable')
+    cut = int(len(df) * (1 - holdout_fraction))
+    return df.iloc[:cut], df.iloc[cut:]
+
+
+def holdout_loss(model, feature_cols, holdout, metric):
+    """Lower is better, whatever the metric"""
+    X, y = encode(holdout, feature_cols)
+    probs = model.predict_proba(X)[:, 1]
+    if metric == "accuracy":
+        return 1 - accuracy_score(y, probs > 0.5)
+    if metric == "brier":
+        return brier_score_loss(y, probs)
+    return log_loss(y, probs, labels=[0, 1])
+
+
+def load_current():
+    # The champion the challenger has to beat (None if nothing is published yet)
+    bundle = get_registry().load()
+    if bundle is None:
+        return None, None
+    return bundle.model, bundle.features
+
+
+def fit_forest(params, X, y, n_jobs):
+    model = RandomForestClassifier(class_weight="balanced", random_state=42, n_jobs=n_jobs, **params)
+    return model.fit(X, y)
+
+
+def score_candidate(params, X_train, y_train, feature_cols, holdout, metric):
+    # One core per candidate, the candidates themselves run in parallel.
+    # The fitted model comes back too: the winner is the challenger, no refit needed
+    model = fit_forest(params, X_train, y_train, n_jobs=1)
+    return holdout_loss(model, feature_cols, holdout, metric), model
+
+
+def run_retraining(should_stop=None):
+    """should_stop: callable checked between stages; True -> RetrainCancelled"""
+    settings = load_settings()
+    trainer_settings = settings["trainer"]
+    start = time.perf_counter()
+    timer = StageTimer()  # load / fit / save
+
+    if trainer_settings["mode"] == "incremental":
+        report = run_incremental(settings["storage"], trainer_settings, timer, should_stop)
+    else:
+        report = run_full(settings["storage"], trainer_settings, timer, should_stop)
+
+    if report:
+        report["wall_time_s"] = round(time.perf_counter() - start, 3)
+        report["stages_s"] = timer.seconds
+        logger.info(
+            "Retrain report: %s | rows processed: %s | wall time: %ss (%s) | published: %s",
+            report['mode'], report['rows_processed'], report['wall_time_s'], timer.seconds, report['published']
+        )
+    return report
+
+
+def run_full(storage, trainer, timer, should_stop=None):
+    logger.info("♻️  TRAINING STARTED: Loading data...")
+
     # 1. Load Data
-    if not os.path.exists("data/transactions2.csv"):
-        print("No data found.")
+    if not has_transactions(storage):
+        logger.warning("No data found.")
         return False
-        
-    df = pd.read_csv("data/transactions2.csv")
+
+    df = load_transactions(storage, columns=TRAINING_COLUMNS)
 
     # 2. Cleaning
-    df = df.dropna()
-    df = df[df['purchased'].isin([0, 1])]
-    df = df[df['inventory_level'] > 0] 
+    df = clean(df)
 
     if len(df) < 50:
-        print("Not enough data to retrain yet.")
+        logger.warning("Not enough data to retrain yet.")
         return False
+    timer.lap("load")
 
     # 3. Feature Engineering (One-Hot)
-    df_encoded = pd.get_dummies(df, columns=['product_name'], drop_first=False)
-    
-    # Save feature names so we don't break the API
-    feature_cols = ['price_offered', 'inventory_level'] + [c for c in df_encoded.columns if 'product_name_' in c]
-    joblib.dump(feature_cols, "models/model_features.pkl")
+    products = sorted(df['product_name'].unique())
+    feature_cols = ['price_offered', 'inventory_level'] + [f"product_name_{p}" for p in products]
 
-    X = df_encoded[feature_cols]
-    y = df_encoded['purchased'].astype(int)
+    train, holdout = time_split(df, trainer["holdout_fraction"])
+    metric = trainer["metric"]
+
+    # The champion is judged on holdout rows it has never seen (it was refit on
+    # everything up to its watermark, so older rows flatter it). Too few of
+    # them -> no fair comparison possible, keep the champion
+    current, current_features = load_current()
+    state = read_state()
+    unseen = holdout if state is None else holdout[holdout.index.isin(after_watermark(df, state).index)]
+    if current is not None and len(unseen) < trainer["min_holdout_rows"]:
+        logger.info("Only %d holdout rows are new to the current model, keeping it.", len(unseen))
+        timer.lap("fit")
+        return {
+            "mode": "full",
+            "rows_processed": len(df),
+            "metric": metric,
+            "unseen_holdout_rows": len(unseen),
+            "published": False,
+            "reason": "skipped: insufficient holdout"
+        }
 
-    # 4. Train
-    model = RandomForestClassifier(
-        n_estimators=100, 
-        max_depth=10, 
-        class_weight="balanced",
-        random_state=42
+    # 4. Candidate search, one candidate per core
+    check_cancelled(should_stop)
+    X_train, y_train = encode(train, feature_cols)
+    candidates = trainer["search"]
+    scored = Parallel(n_jobs=trainer["n_jobs"])(
+        delayed(score_candidate)(params, X_train, y_train, feature_cols, holdout, metric)
+        for params in candidates
     )
-    model.fit(X, y)
-    
-    # 5. Evaluate
-    acc = accuracy_score(y, model.predict(X))
-    print(f"New Model Trained! Accuracy: {acc:.2f}")
+    losses = [loss for loss, _ in scored]
+    best = int(np.argmin(losses))
+    for params, loss in zip(candidates, losses):
+        logger.info("  candidate %s: holdout %s %.4f", params, metric, loss)
+
+    # 5. Champion vs Challenger, on the unseen holdout rows
+    current_loss = challenger_loss = None
+    if current is not None:
+        challenger_loss = holdout_loss(scored[best][1], feature_cols, unseen, metric)
+        current_loss = holdout_loss(current, current_features, unseen, metric)
+    published = current_loss is None or challenger_loss < current_loss - trainer["min_improvement"]
+
+    report = {
+        "mode": "full",
+        "rows_processed": len(df),
+        "params": candidates[best],
+        "metric": metric,
+        "holdout_loss": round(float(losses[best]), 4),
+        "current_loss": round(float(current_loss), 4) if current_loss is not None else None,
+        "challenger_loss": round(float(challenger_loss), 4) if challenger_loss is not None else None,
+        "published": published
+    }
+    if not published:
+        logger.info("Challenger (%.4f) does not beat the current model (%.4f), keeping it.", challenger_loss, current_loss)
+        timer.lap("fit")
+        return report
+
+    # 6. Refit the winner on everything (holdout included), using every core for the trees
+    X, y = encode(df, feature_cols)
+    model = fit_forest(candidates[best], X, y, n_jobs=trainer["n_jobs"])
+    logger.info("New Model Trained! Holdout %s: %.4f", metric, losses[best])
+    timer.lap("fit")
+
+    # 7. Save (feature names too, so we don't break the API)
+    check_cancelled(should_stop)
+    publish(model, feature_cols, df, len(df), report)
+    timer.lap("save")
+
+    return report
+
+
+def run_incremental(storage, trainer, timer, should_stop=None):
+    """Updates the current model from the rows that arrived since the last retrain"""
+    incremental = trainer["incremental"]
+    state = read_state()
+    if state is None:
+        logger.info("No previous model/high-water mark, doing a full retrain first.")
+        return run_full(storage, trainer, timer, should_stop)
+
+    logger.info("♻️  INCREMENTAL TRAINING: Loading rows after %s...", state['watermark'])
+
+    # 1. Load only what's new (the parquet store skips older day folders entirely)
+    # (since is inclusive: rows in the watermark's own second may still be new)
+    df = load_transactions(storage, columns=TRAINING_COLUMNS, since=state["watermark"])
+
+    # 2. Cleaning
+    df = after_watermark(clean(df), state)
+
+    if len(df) < incremental["min_new_rows"]:
+        logger.info("Only %d new rows, not enough to update the model yet.", len(df))
+        return False
+
+    # 3. Same feature contract as the model being served
+    current, feature_cols = load_current()
+    unknown = {f"product_name_{p}" for p in df['product_name'].unique()} - set(feature_cols)
+    if unknown:
+        logger.info("New products %s are not in the feature contract, doing a full retrain.", sorted(unknown))
+        return run_full(storage, trainer, timer, should_stop)
+
+    # The newest new rows are kept aside to judge the update; they get
+    # learned next time since the watermark only moves past `train`
+    train, holdout = time_split(df, trainer["holdout_fraction"])
+    X, y = encode(train, feature_cols)
+    if y.nunique() < 2:
+        logger.info("New rows only contain one outcome, skipping this update.")
+        return False
+    timer.lap("load")
+
+    # 4. Train (on a copy, the current model has to stay intact for the comparison)
+    model = copy.deepcopy(current)
+    estimator = incremental["estimator"]
+    rows_used = len(train)
+
+    if estimator == "sgd":
+        if not isinstance(model, IncrementalSGDModel):
+            # Switching from the forest: bootstrap the SGD model on the full history once
+            logger.info("Bootstrapping SGD model on the full history...")
+            history = clean(load_transactions(storage, columns=TRAINING_COLUMNS))
+            history = history[history['timestamp'] <= train['timestamp'].max()]
+            model = IncrementalSGDModel(feature_cols).partial_fit(*encode(history, feature_cols))
+            rows_used = len(history)
+        else:
+            model.partial_fit(X, y)
+
+    elif estimator == "forest":
+        if not isinstance(model, RandomForestClassifier):
+            logger.info("Current model is not a forest, doing a full retrain.")
+            return run_full(storage, trainer, timer, should_stop)
+
+        # warm_start: fit() only grows the new trees, on the new window only.
+        # Class balance comes from the window's own sample weights: sklearn
+        # warns against the class_weight presets with warm_start
+        model.set_params(
+            warm_start=True,
+            class_weight=None,
+            n_jobs=trainer["n_jobs"],
+            n_estimators=len(model.estimators_) + incremental["trees_per_update"]
+        )
+        model.fit(X, y, sample_weight=compute_sample_weight("balanced", y))
+
+        # Sliding window of trees: forget the oldest ones
+        if len(model.estimators_) > incremental["max_trees"]:
+            model.estimators_ = model.estimators_[-incremental["max_trees"]:]
+            model.n_estimators = len(model.estimators_)
+
+    else:
+        raise ValueError(f"Unknown incremental estimator: {estimator}")
+
+    # 5. Updated model vs current one, on the held-out newest rows
+    metric = trainer["metric"]
+    loss = holdout_loss(model, feature_cols, holdout, metric)
+    current_loss = holdout_loss(current, feature_cols, holdout, metric)
+    published = loss < current_loss - trainer["min_improvement"]
+
+    report = {
+        "mode": f"incremental/{estimator}",
+        "rows_processed": rows_used,
+        "metric": metric,
+        "holdout_loss": round(float(loss), 4),
+        "current_loss": round(float(current_loss), 4),
+        "published": published
+    }
+    if not published:
+        logger.info("Update (%.4f) does not beat the current model (%.4f), keeping it.", loss, current_loss)
+        timer.lap("fit")
+        return report
+
+    logger.info("Model Updated! Holdout %s: %.4f", metric, loss)
+    timer.lap("fit")
 
     # 6. Save
-    if not os.path.exists("models"):
-        os.makedirs("models")
-    joblib.dump(model, "models/pricing_model.pkl")
-    
-    return True
\ No newline at end of file
+    check_cancelled(should_stop)
+    publish(model, feature_cols, train, state["rows_processed"] + len(train), report, state)
+    timer.lap("save")
+
+    return report
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+from src import api
+from src.config import load_settings
+from src.engine import PricingEngine
+from src.metrics import MetricsRegistry, metrics
+from src.registry import ModelRegistry
+
+FEATURES = ["price_offered", "inventory_level", "product_name_Meat", "product_name_Milk"]
+ITEMS = [
+    {"product_name": "Milk", "base_price": 1.5, "inventory_level": 10},
+    {"product_name": "Meat", "base_price": 9.0, "inventory_level": 80},
+    {"product_name": "Milk", "base_price": 1.5, "inventory_level": 0}
+]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # No lifespan: the app serves a small model from a throwaway registry
+    rng = np.random.default_rng(0)
+    meat = rng.integers(0, 2, 600)
+    X = np.column_stack([rng.uniform(0.5, 15, 600), rng.integers(0, 101, 600), meat, 1 - meat])
+    y = (X[:, 0] < np.where(meat == 1, 10, 1.8)).astype(int)
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.publish(RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0).fit(X, y), FEATURES, {})
+
+    settings = load_settings()
+    settings["api"]["cache"]["enabled"] = False
+    settings["api"]["surface"]["enabled"] = False
+    engine = PricingEngine(settings, registry)
+    assert engine.load_model()
+    monkeypatch.setattr(api, "engine", engine)
+    return TestClient(api.app)
+
+
+def test_batch_matches_single_predictions_in_one_model_call(client, monkeypatch):
+    singles = [client.post("/predict", json=item).json() for item in ITEMS]
+
+    calls = []
+    score = api.engine.score
+    monkeypatch.setattr(api.engine, "score", lambda active, items: calls.append(items) or score(active, items))
+    response = client.post("/predict/batch", json={"items": ITEMS})
+
+    assert response.status_code == 200
+    assert response.json()["results"] == singles
+    assert len(calls) == 1 and len(calls[0]) == len(ITEMS)
+
+
+def test_empty_batch(client):
+    response = client.post("/predict/batch", json={"items": []})
+    assert response.status_code == 200
+    assert response.json() == {"results": []}
+
+
+def test_batch_without_a_model_returns_base_prices(monkeypatch):
+    monkeypatch.setattr(api.engine, "active", None)
+    response = TestClient(api.app).post("/predict/batch", json={"items": ITEMS[:2]})
+    assert [r["optimal_price"] for r in response.json()["results"]] == [1.5, 9.0]
+    assert not any(r["model_active"] for r in response.json()["results"])
+
+
+def test_metrics_endpoint_renders_prometheus_text(client):
+    metrics.reset("pricing_http_")
+    client.post("/predict", json=ITEMS[0])
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert "# TYPE pricing_http_request_seconds histogram" in text
+    assert 'pricing_http_request_seconds_count{endpoint="/predict"} 1' in text
+    assert 'pricing_inference_seconds_bucket{le="+Inf"}' in text
+
+
+def test_render_is_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "demo", {"stage": "fit"}, (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP demo_seconds demo", "# TYPE demo_seconds histogram"]
+    assert lines[2:] == [
+        'demo_seconds_bucket{le="0.1",stage="fit"} 1',
+        'demo_seconds_bucket{le="1.0",stage="fit"} 2',
+        'demo_seconds_bucket{le="+Inf",stage="fit"} 3',
+        f'demo_seconds_sum{{stage="fit"}} {0.05 + 0.5 + 5.0}',
+        'demo_seconds_count{stage="fit"} 3'
+    ]
@@ -0,0 +1,18 @@
+from src import engine, scheduler, simulation2
+from src.backtest import FixedPricePolicy, run_replica
+
+PRODUCTS = [{"name": "Coffee", "base_price": 3.0, "inventory": 100}, {"name": "Tea", "base_price": 2.0, "inventory": 100}]
+
+
+def test_replicas_build_no_engine_or_scheduler(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise AssertionError("a replica built its own pricing engine or scheduler")
+
+    # Whatever simulation.pricing_mode says
+    monkeypatch.setattr(simulation2, "make_pricing_client", refuse)
+    monkeypatch.setattr(engine.PricingEngine, "__init__", refuse)
+    monkeypatch.setattr(scheduler.RetrainScheduler, "__init__", refuse)
+
+    results = [run_replica((FixedPricePolicy(), PRODUCTS, seed, 500, 100)) for seed in range(3)]
+    assert [r["seed"] for r in results] == [0, 1, 2]
+    assert all(r["events"] == 500 for r in results)
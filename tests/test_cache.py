@@ -0,0 +1,70 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src import cache as cache_module
+from src.cache import PriceCache
+from src.config import load_settings
+from src.engine import PricingEngine
+from src.registry import ModelRegistry
+
+FEATURES = ["price_offered", "inventory_level", "product_name_Milk"]
+DECISION = {"optimal_price": 1.5, "probability": 0.5, "expected_revenue": 0.75, "model_active": True}
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = PriceCache(ttl_seconds=10)
+    key = cache.key("Milk", 1.5, 10)
+    cache.put(key, DECISION, cache.generation)
+
+    now[0] += 9
+    assert cache.get(key) == DECISION
+    now[0] += 2
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_inventory_buckets_share_a_decision():
+    cache = PriceCache(inventory_bucket=5)
+    assert cache.key("Milk", 1.5, 40) == cache.key("Milk", 1.5, 44) != cache.key("Milk", 1.5, 45)
+
+
+def test_decision_from_before_a_swap_is_never_stored():
+    cache = PriceCache()
+    key = cache.key("Milk", 1.5, 10)
+    generation = cache.generation  # request starts scoring with the old model...
+    with cache.swap():
+        pass                       # ...the model is swapped meanwhile
+    cache.put(key, DECISION, generation)
+    assert cache.get(key) is None
+
+
+def published_engine(tmp_path):
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.uniform(0.5, 3, 400), rng.integers(0, 101, 400), np.ones(400)])
+    y = (X[:, 0] < 1.6).astype(int)
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.publish(model, FEATURES, {"mode": "test"})
+    settings = load_settings()
+    settings["api"]["surface"]["enabled"] = False
+    settings["api"]["input_drift"]["enabled"] = False
+    engine = PricingEngine(settings, registry)
+    assert engine.load_model()
+    return engine, registry, model
+
+
+def test_model_swap_invalidates_the_engines_cache(tmp_path):
+    engine, registry, model = published_engine(tmp_path)
+    first = engine.price("Milk", 1.5, 10)
+    assert engine.price("Milk", 1.5, 10) == first
+    assert engine.cache.stats()["hits"] == 1
+
+    registry.publish(model, FEATURES, {"mode": "test"})
+    assert engine.load_model()
+    stats = engine.cache.stats()
+    assert stats["size"] == 0 and stats["invalidations"] == 2
+    engine.price("Milk", 1.5, 10)
+    assert engine.cache.stats()["misses"] == 2
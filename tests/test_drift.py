@@ -0,0 +1,32 @@
+import numpy as np
+
+from src.simulation2 import DriftDetector
+
+
+def test_bulk_per_product_windows_match_sequential():
+    rng = np.random.default_rng(0)
+    n = 3000
+    probs = rng.uniform(0, 1, n)
+    outcomes = rng.integers(0, 2, n)
+    products = rng.choice([f"sku{i}" for i in range(40)], n)
+
+    bulk = DriftDetector(window_size=50, threshold=0.5)
+    bulk.add_events(probs, outcomes, products)
+    sequential = DriftDetector(window_size=50, threshold=0.5)
+    for p, o, name in zip(probs, outcomes, products):
+        sequential.add_event(p, o, name)
+
+    assert bulk.products.keys() == sequential.products.keys()
+    for name, window in sequential.products.items():
+        for key, value in window.metrics().items():
+            assert np.isclose(bulk.products[name].metrics()[key], value)
+
+
+def test_large_catalog_tick_keeps_every_event():
+    # 20k events over a 20k-SKU catalog, most SKUs seen once or twice
+    rng = np.random.default_rng(1)
+    n = 20000
+    products = np.array([f"sku{i}" for i in rng.integers(0, 20000, n)])
+    detector = DriftDetector(window_size=50, threshold=0.5)
+    detector.add_events(rng.uniform(0, 1, n), rng.integers(0, 2, n), products)
+    assert sum(len(w) for w in detector.products.values()) == n
@@ -0,0 +1,50 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.features import FeatureLayout
+from src.trainer import encode
+
+FEATURES = ["price_offered", "inventory_level", "product_name_Meat", "product_name_Milk"]
+
+
+def test_build_matches_the_trainers_encoding():
+    layout = FeatureLayout(FEATURES)
+    candidates = np.array([[1.0, 1.5], [8.0, 9.5]])
+    X = layout.build(["Milk", "Meat"], candidates, [10, 3])
+
+    df = pd.DataFrame({
+        "product_name": ["Milk", "Milk", "Meat", "Meat"],
+        "price_offered": [1.0, 1.5, 8.0, 9.5],
+        "inventory_level": [10, 10, 3, 3],
+        "purchased": [0, 0, 0, 0]
+    })
+    expected, _ = encode(df, FEATURES)
+    assert X.dtype == np.float32
+    assert np.array_equal(X, expected.to_numpy(dtype=np.float32))
+
+
+def test_buffer_is_reused_and_cleared():
+    layout = FeatureLayout(FEATURES)
+    first = layout.build(["Meat"] * 3, np.ones((3, 4)), [5, 5, 5])
+    second = layout.build(["Milk"], np.full((1, 4), 2.0), [7])
+
+    # Same per-thread buffer, and no one-hot flag left over from the bigger request
+    assert np.shares_memory(first, second)
+    assert (second[:, 2] == 0).all() and (second[:, 3] == 1).all()
+
+    unknown = layout.build(["Bread"], np.ones((1, 4)), [1])
+    assert (unknown[:, 2:] == 0).all()
+
+
+def test_every_thread_gets_its_own_buffer():
+    layout = FeatureLayout(FEATURES)
+    main = layout.build(["Milk"], np.ones((1, 4)), [1])
+    other = []
+    thread = threading.Thread(target=lambda: other.append(layout.build(["Meat"], np.ones((1, 4)), [2])))
+    thread.start()
+    thread.join()
+
+    assert not np.shares_memory(main, other[0])
+    assert (main[:, 3] == 1).all() and (main[:, 1] == 1).all()
@@ -0,0 +1,72 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.flat_forest import FastForest, FlatForest, compile_forest
+
+FEATURES = ["price_offered", "inventory_level", "product_name_Milk", "product_name_Meat"]
+
+
+def fitted_forest(seed=0, n=2000):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(0.5, 12.0, n),
+        rng.integers(0, 101, n),
+        rng.integers(0, 2, n),
+        rng.integers(0, 2, n)
+    ])
+    y = (X[:, 0] < 4 + 0.03 * X[:, 1] + rng.normal(0, 1, n)).astype(int)
+    return RandomForestClassifier(n_estimators=30, max_depth=8, random_state=seed).fit(X, y)
+
+
+def random_inputs(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(0.0, 15.0, n),
+        rng.integers(-5, 120, n),
+        rng.integers(0, 2, n),
+        rng.integers(0, 2, n)
+    ]).astype(float)
+
+
+def test_flat_matches_sklearn_on_random_inputs():
+    forest = fitted_forest()
+    flat = FlatForest.from_sklearn(forest, FEATURES)
+    X = random_inputs(5000)
+    assert np.max(np.abs(flat.predict_proba(X) - forest.predict_proba(X))) <= 1e-9
+
+
+def test_chunked_walk_matches_single_walk():
+    forest = fitted_forest()
+    flat = FlatForest.from_sklearn(forest, FEATURES)
+    X = random_inputs(3001)
+    whole = flat.predict_proba(X)
+    flat.chunk_rows = 256
+    assert np.array_equal(flat.predict_proba(X), whole)
+
+
+def test_compile_forest_routes_and_chunks(tmp_path):
+    forest = fitted_forest()
+    fast = compile_forest(forest, FEATURES, max_rows=128)
+    assert isinstance(fast, FastForest)
+    X = random_inputs(1000)
+    assert np.max(np.abs(fast.predict_proba(X) - forest.predict_proba(X))) <= 1e-9
+
+    # model_format: flat hands over a memory-mapped FlatForest, chunked by max_rows
+    FlatForest.from_sklearn(forest, FEATURES).save(str(tmp_path))
+    mapped = compile_forest(FlatForest.load(str(tmp_path), FEATURES), FEATURES, max_rows=128)
+    assert isinstance(mapped, FlatForest) and mapped.chunk_rows == 128
+    assert np.max(np.abs(mapped.predict_proba(X) - forest.predict_proba(X))) <= 1e-9
+
+
+def test_loaded_forest_walks_the_mapped_arrays(tmp_path):
+    forest = fitted_forest()
+    FlatForest.from_sklearn(forest, FEATURES).save(str(tmp_path))
+    mapped = FlatForest.load(str(tmp_path), FEATURES)
+
+    # Stored in the dtype the walk indexes with, so nothing is copied per worker
+    for name in ("children", "feature", "roots"):
+        array = getattr(mapped, name)
+        assert isinstance(array, np.memmap) and array.dtype == np.intp
+    before = set(vars(mapped))
+    mapped.predict_proba(random_inputs(100))
+    assert set(vars(mapped)) == before
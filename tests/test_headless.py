@@ -0,0 +1,24 @@
+import numpy as np
+
+from src.headless import HeadlessSimulation
+from src.simulation2 import Market
+from src.sinks import NullSink
+
+PRODUCTS = [{"name": "Coffee", "base_price": 3.0, "inventory": 100}, {"name": "Tea", "base_price": 2.0, "inventory": 100}]
+
+
+def test_fallback_quotes_stay_out_of_drift():
+    def pricer(catalog):
+        # Coffee: a model answer. Tea: the API fell back to the base price
+        return catalog.base_price.copy(), np.array([0.9, 0.0]), np.zeros(2), np.array([True, False])
+
+    market = Market(PRODUCTS, sink=NullSink(), seed=0)
+    try:
+        sim = HeadlessSimulation(market, pricer=pricer, record=False)
+        sim.run(500, 100)
+    finally:
+        market.close()
+
+    detector = market.drift_detector
+    assert set(detector.products) == {"Coffee"}
+    assert len(detector.window) == len(detector.products["Coffee"]) > 0
@@ -0,0 +1,61 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.config import DEFAULTS
+from src.pricing_client import LocalPricingClient, PricingClient, make_pricing_client
+
+
+class NoModelHandler(BaseHTTPRequestHandler):
+    """/predict and /predict/batch of an API with no model loaded: base price, probability 0"""
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        answer = lambda item: {"optimal_price": item["base_price"], "probability": 0.0, "expected_revenue": 0.0,
+                               "model_active": False}
+        body = {"results": [answer(i) for i in payload["items"]]} if "items" in payload else answer(payload)
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def no_model_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), NoModelHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_remote_no_model_answers_are_fallback_quotes(no_model_api):
+    client = PricingClient(no_model_api, timeout=2.0)
+    try:
+        quote = client.quote("Milk", 1.5, 10)
+        batch = client.quote_many([("Milk", 1.5, 10), ("Bread", 1.1, 5)])
+    finally:
+        client.close()
+
+    assert quote == (1.5, 0.0, 0.0, "fallback")
+    assert [q.source for q in batch] == ["fallback", "fallback"]
+    assert client._last_good == {}  # never served later as a "stale" model answer
+
+
+def test_injected_engine_starts_no_retrain_scheduler():
+    threads = threading.active_count()
+    client = make_pricing_client(DEFAULTS["simulation"], engine=object())
+
+    assert isinstance(client, LocalPricingClient)
+    assert client.scheduler is None
+    assert threading.active_count() == threads
+    with pytest.raises(RuntimeError):
+        client.retrain()
+    client.close()
@@ -0,0 +1,43 @@
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.dummy import DummyClassifier
+
+from src import api
+from src.registry import ModelRegistry
+
+FEATURES = ["price_offered", "inventory_level"]
+
+
+def test_only_published_versions_are_loadable(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    version = registry.publish(DummyClassifier().fit([[1, 2]], [1]), FEATURES, {"mode": "test"})
+
+    assert registry.has_version(version)
+    assert registry.load(version).features == FEATURES
+    for bad in ("../../etc", "v9999", "v01", "..", "/tmp/x", ""):
+        assert not registry.has_version(bad)
+    with pytest.raises(ValueError):
+        registry.load("../" + version)
+    with pytest.raises(ValueError):
+        registry.metadata("v9999")
+
+
+def test_versions_sort_by_number(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"), keep=10)
+    (tmp_path / "registry" / "v9999").mkdir()
+    (tmp_path / "registry" / "v0002").mkdir()
+    assert registry.versions() == ["v0002", "v9999"]
+
+    version = registry.publish(DummyClassifier().fit([[1, 2]], [1]), FEATURES, {"mode": "test"})
+    assert version == "v10000"
+    assert registry.versions() == ["v0002", "v9999", "v10000"]
+    assert registry.latest_version() == "v10000"
+
+
+def test_reload_rejects_unknown_versions():
+    # No lifespan: nothing is loaded, the version check comes first
+    client = TestClient(api.app)
+    for bad in ("../../../tmp/evil", "v9999"):
+        response = client.post("/reload", params={"version": bad})
+        assert response.status_code == 404
+    assert not api.engine.reload_lock.locked()
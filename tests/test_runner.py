@@ -0,0 +1,41 @@
+import time
+
+from src.runner import SimulationRunner
+
+
+class CountingMarket:
+    def __init__(self):
+        self.steps = 0
+        self.closes = 0
+
+    def simulate_step(self):
+        self.steps += 1
+
+    def close(self):
+        self.closes += 1
+
+
+def test_abandoned_runner_stops_and_closes_its_market():
+    market = CountingMarket()
+    runner = SimulationRunner(market, events_per_second=200, alive=lambda: False, grace_seconds=0.2)
+    runner.resume()
+
+    runner.thread.join(timeout=5)
+    assert not runner.thread.is_alive()
+    assert runner.stopped
+    assert market.closes == 1
+
+    runner.close()  # the dashboard's Reset afterwards doesn't close it twice
+    assert market.closes == 1
+
+
+def test_live_session_keeps_ticking():
+    market = CountingMarket()
+    runner = SimulationRunner(market, events_per_second=200, alive=lambda: True, grace_seconds=0.1)
+    runner.resume()
+    time.sleep(0.5)
+
+    assert runner.thread.is_alive()
+    assert market.steps > 0
+    runner.close()
+    assert market.closes == 1
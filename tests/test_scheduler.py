@@ -0,0 +1,86 @@
+import subprocess
+import time
+
+from src import scheduler as scheduler_module
+from src.scheduler import RetrainScheduler
+from src.trainer import check_cancelled
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_failing_reload_keeps_the_worker_alive(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "_train_in_thread", lambda should_stop=None: {"published": True})
+    calls = []
+
+    def failing_reload():
+        calls.append(1)
+        raise RuntimeError("corrupt bundle")
+
+    scheduler = RetrainScheduler(failing_reload, min_interval_seconds=0.0, separate_process=False)
+    try:
+        assert scheduler.request() == "scheduled"
+        assert wait_for(lambda: scheduler.status()["runs"] == 1)
+        assert scheduler.worker.is_alive()
+        assert scheduler.last_run()["outcome"] == "reload_failed"
+        assert "corrupt bundle" in scheduler.last_run()["error"]
+
+        # The next request is still served
+        assert scheduler.request() == "scheduled"
+        assert wait_for(lambda: scheduler.status()["runs"] == 2)
+        assert len(calls) == 2
+        assert scheduler.status()["state"] == "idle"
+    finally:
+        scheduler.shutdown()
+
+
+def test_cancel_before_the_child_starts(monkeypatch):
+    started = []
+    monkeypatch.setattr(subprocess, "Popen", lambda *args, **kwargs: started.append(args))
+    scheduler = RetrainScheduler(min_interval_seconds=0.0)
+    try:
+        # The worker has taken the run (running=True) but not started its child yet
+        with scheduler.condition:
+            scheduler.running = True
+        assert scheduler.cancel() is True
+        assert scheduler._run()[0] == "cancelled"
+        assert started == []
+    finally:
+        scheduler.shutdown()
+
+
+def test_cancel_stops_an_in_thread_run(monkeypatch):
+    def train(should_stop=None):
+        while not should_stop():
+            time.sleep(0.01)
+        check_cancelled(should_stop)
+
+    monkeypatch.setattr(scheduler_module, "_train_in_thread", train)
+    scheduler = RetrainScheduler(min_interval_seconds=0.0, separate_process=False)
+    try:
+        scheduler.request()
+        assert wait_for(lambda: scheduler.status()["state"] == "running")
+        assert scheduler.cancel() is True
+        assert wait_for(lambda: scheduler.status()["runs"] == 1)
+        assert scheduler.last_run()["outcome"] == "cancelled"
+        assert scheduler.status()["cancelled"] == 1
+    finally:
+        scheduler.shutdown()
+
+
+def test_child_starts_outside_the_repo_root(tmp_path, monkeypatch):
+    # An API started elsewhere: the child still imports src.*, and reads the API's own cwd (no data here)
+    monkeypatch.chdir(tmp_path)
+    scheduler = RetrainScheduler(min_interval_seconds=0.0, timeout_seconds=120.0)
+    try:
+        scheduler.request()
+        assert wait_for(lambda: scheduler.status()["runs"] == 1, timeout=120.0)
+        assert scheduler.last_run()["outcome"] == "no_data", scheduler.last_run()["error"]
+    finally:
+        scheduler.shutdown()
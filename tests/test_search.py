@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from src.search import PriceSearch, round_prices
+
+
+def test_x9_rounding_stays_inside_narrow_bounds():
+    # [1.01, 1.07] holds no price ending in 9 cents
+    low, high = np.array([1.01]), np.array([1.07])
+    rounded = round_prices(np.array([[1.01, 1.04, 1.07]]), "x9", low, high)
+    assert (rounded >= low[:, None]).all() and (rounded <= high[:, None]).all()
+
+
+@pytest.mark.parametrize("strategy", ["grid", "coarse_to_fine", "golden"])
+@pytest.mark.parametrize("budget", [1, 2, 5])
+def test_search_honors_the_budget(strategy, budget):
+    evaluations = []
+
+    def evaluate(candidates):
+        evaluations.append(candidates.shape[1])
+        return np.clip(1.5 - candidates / 2, 0, 1)
+
+    search = PriceSearch(strategy=strategy, budget=budget)
+    price, prob, revenue = search.run(evaluate, [1.0, 2.0])
+    assert sum(evaluations) <= budget
+    assert len(evaluations) <= (1 if strategy == "grid" else search.max_calls)
+    assert ((price >= [0.7, 1.4]) & (price <= [1.6, 3.2])).all()
+
+
+@pytest.mark.parametrize("strategy", ["coarse_to_fine", "golden"])
+@pytest.mark.parametrize("max_calls", [1, 2, 4])
+def test_search_honors_the_call_cap(strategy, max_calls):
+    calls = []
+
+    def evaluate(candidates):
+        calls.append(candidates.shape[1])
+        return np.clip(1.5 - candidates / 2, 0, 1)
+
+    PriceSearch(strategy=strategy, budget=100, max_calls=max_calls).run(evaluate, [1.0, 2.0])
+    assert len(calls) == max_calls
@@ -0,0 +1,127 @@
+import atexit
+import os
+
+import pytest
+
+from src import sinks, store
+from src.sinks import ParquetBackend, TransactionSink, live_files
+
+pytest.importorskip("pyarrow")
+
+
+def rows(n, start=0, product="Milk"):
+    return [
+        {"timestamp": f"2026-01-17 10:00:{(start + i) % 60:02d}", "product_name": product, "price_offered": 1.5,
+         "inventory_level": start + i, "budget_multiplier": 1.0, "purchased": 1}
+        for i in range(n)
+    ]
+
+
+def load(root):
+    return store.load_transactions({"backend": "parquet", "parquet_path": str(root)})
+
+
+def test_compaction_window_shows_each_row_once(tmp_path, monkeypatch):
+    backend = ParquetBackend(str(tmp_path), compact_min_files=100)
+    for i in range(5):
+        backend.write_rows(rows(3, start=3 * i))
+    folder = backend.partition_dir("2026-01-17", "Milk")
+
+    # Freeze compaction right after the rename: merged file and its inputs both on disk
+    monkeypatch.setattr(sinks.os, "remove", lambda path: None)
+    backend.compact(folder)
+    assert len(os.listdir(folder)) == 6
+    assert live_files(folder)[0].startswith("compact-") and len(live_files(folder)) == 1
+
+    df = load(tmp_path)
+    assert len(df) == 15
+    assert sorted(df["inventory_level"]) == list(range(15))
+
+    # Parts written after the compaction are still read
+    backend.write_rows(rows(2, start=15))
+    assert len(load(tmp_path)) == 17
+
+
+def test_read_retries_when_a_part_disappears(tmp_path, monkeypatch):
+    backend = ParquetBackend(str(tmp_path), compact_min_files=100)
+    backend.write_rows(rows(3))
+    backend.write_rows(rows(3, start=3))
+    folder = backend.partition_dir("2026-01-17", "Milk")
+
+    # First listing is stale: it names a part a compaction already deleted
+    real_live_files = store.live_files
+    calls = []
+
+    def stale_once(path):
+        calls.append(path)
+        if len(calls) == 1:
+            return real_live_files(path) + ["part-1-000000.parquet"]
+        return real_live_files(path)
+
+    monkeypatch.setattr(store, "live_files", stale_once)
+    assert len(load(tmp_path)) == 6
+    assert len(calls) == 2
+
+
+def test_repeated_compaction_keeps_every_row(tmp_path):
+    backend = ParquetBackend(str(tmp_path), compact_min_files=3)
+    for i in range(10):
+        backend.write_rows(rows(2, start=2 * i))
+    backend.close()
+    folder = backend.partition_dir("2026-01-17", "Milk")
+    assert len(os.listdir(folder)) == 1
+    assert sorted(load(tmp_path)["inventory_level"]) == list(range(20))
+
+
+class FlakyBackend:
+    """Fails the first `failures` writes, then keeps everything"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.rows = []
+
+    def write_rows(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.rows.extend(rows)
+
+    def close(self):
+        pass
+
+
+def test_failed_flush_keeps_rows_for_the_next_one():
+    backend = FlakyBackend(failures=1)
+    sink = TransactionSink(backend, flush_rows=1000, background=False)
+    sink.write_many(rows(3))
+    with pytest.raises(OSError):
+        sink.flush()
+    assert sink.stats()["pending"] == 3
+
+    sink.write_many(rows(2, start=3))
+    sink.close()
+    assert [row["inventory_level"] for row in backend.rows] == [0, 1, 2, 3, 4]
+    assert sink.stats() == {"pending": 0, "rows_written": 5, "flushes": 1}
+
+
+def test_closed_sink_leaves_no_exit_handler(monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    monkeypatch.setattr(atexit, "unregister", registered.remove)
+
+    sink = TransactionSink(FlakyBackend(failures=0), background=False)
+    assert registered == [sink.close]
+    sink.close()
+    assert registered == []
+
+
+def test_clear_transactions_empties_the_configured_store(tmp_path):
+    parquet = {"backend": "parquet", "parquet_path": str(tmp_path / "transactions"), "csv_path": "unused.csv"}
+    ParquetBackend(parquet["parquet_path"], compact_min_files=100).write_rows(rows(3))
+    csv = {"backend": "csv", "csv_path": str(tmp_path / "transactions2.csv")}
+    sinks.CsvBackend(csv["csv_path"]).write_rows(rows(3))
+
+    for storage in (parquet, csv):
+        assert store.has_transactions(storage)
+        store.clear_transactions(storage)
+        assert not store.has_transactions(storage)
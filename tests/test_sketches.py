@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from src.sketches import InputMonitor, reference_profile
+
+BASE_PRICES = {"Milk": 1.5, "Meat": 7.67}
+
+
+def training_rows(n=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    names = rng.choice(list(BASE_PRICES), n)
+    base = np.array([BASE_PRICES[name] for name in names])
+    return pd.DataFrame({
+        "product_name": names,
+        "price_offered": np.round(base * rng.uniform(0.7, 1.6, n), 2),
+        "inventory_level": rng.integers(0, 101, n)
+    })
+
+
+def replay(monitor, df, base_prices):
+    for name, inventory in zip(df["product_name"], df["inventory_level"]):
+        monitor.observe(name, base_prices[name], inventory)
+
+
+def test_in_distribution_requests_are_stable():
+    reference = reference_profile(training_rows(), base_prices=BASE_PRICES)
+    monitor = InputMonitor(reference, min_count=50)
+    replay(monitor, training_rows(seed=1), BASE_PRICES)
+
+    report = monitor.report()
+    assert report["status"] == "stable"
+    assert report["max_psi"] < 0.1
+    assert "price_offered" not in report["products"]["Milk"]
+
+
+def test_base_price_change_is_significant():
+    reference = reference_profile(training_rows(), base_prices=BASE_PRICES)
+    monitor = InputMonitor(reference, min_count=50)
+    replay(monitor, training_rows(seed=1), {"Milk": 1.5, "Meat": 9.99})
+
+    report = monitor.report()
+    assert report["status"] == "significant"
+    assert report["products"]["Meat"]["base_price"]["psi"] > 0.25
+    assert report["products"]["Milk"]["base_price"]["psi"] < 0.1
+
@@ -0,0 +1,54 @@
+import numpy as np
+import yaml
+from sklearn.ensemble import RandomForestClassifier
+
+from src.config import load_settings
+from src.engine import PricingEngine
+from src.registry import ModelRegistry
+
+FEATURES = ["price_offered", "inventory_level", "product_name_Meat", "product_name_Milk"]
+CATALOG = [{"name": "Milk", "base_price": 1.5}, {"name": "Meat", "base_price": 9.0}]
+
+
+def surface_engine(tmp_path, max_inventory=20):
+    rng = np.random.default_rng(0)
+    meat = rng.integers(0, 2, 600)
+    X = np.column_stack([rng.uniform(0.5, 15, 600), rng.integers(0, 21, 600), meat, 1 - meat])
+    y = (X[:, 0] < np.where(meat == 1, 10, 1.8) + 0.02 * X[:, 1]).astype(int)
+    model = RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0).fit(X, y)
+
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.publish(model, FEATURES, {"mode": "test"})
+    catalog_path = tmp_path / "products.yaml"
+    catalog_path.write_text(yaml.safe_dump({"products": CATALOG}))
+
+    settings = load_settings()
+    settings["api"]["surface"] = {"enabled": True, "catalog_path": str(catalog_path), "max_inventory": max_inventory}
+    settings["api"]["cache"]["enabled"] = False
+    settings["api"]["input_drift"]["enabled"] = False
+    engine = PricingEngine(settings, registry)
+    assert engine.load_model()
+    return engine
+
+
+def test_surface_matches_live_scoring(tmp_path):
+    engine = surface_engine(tmp_path)
+    surface = engine.active.surface
+    items = [(p["name"], p["base_price"], inventory) for p in CATALOG for inventory in range(21)]
+
+    looked_up = [surface.lookup(*item) for item in items]
+    live = engine.score(engine.active, items)
+    for table, direct in zip(looked_up, live):
+        assert table is not None
+        assert np.isclose(table["optimal_price"], direct["optimal_price"])
+        assert np.isclose(table["probability"], direct["probability"])
+        assert np.isclose(table["expected_revenue"], direct["expected_revenue"])
+
+
+def test_anything_outside_the_table_is_scored_live(tmp_path):
+    engine = surface_engine(tmp_path)
+    surface = engine.active.surface
+    for item in (("Milk", 1.6, 5), ("Milk", 1.5, 21), ("Milk", 1.5, -1), ("Bread", 1.1, 5)):
+        assert surface.lookup(*item) is None
+        assert engine.price(*item) == engine.score(engine.active, [item])[0]
+    assert surface.stats()["fallbacks"] == 8 and surface.stats()["hits"] == 0
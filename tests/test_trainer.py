@@ -0,0 +1,93 @@
+import copy
+
+import pytest
+
+from benchmarks.synthetic import generate_transactions, load_products
+from src import trainer as trainer_module
+from src.config import load_settings
+from src.metrics import StageTimer
+from src.registry import ModelRegistry
+
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    monkeypatch.setattr(trainer_module, "_registry", registry)
+
+    csv_path = tmp_path / "transactions.csv"
+    generate_transactions(2000, load_products(), seed=0).to_csv(csv_path, index=False)
+    storage = dict(load_settings()["storage"], backend="csv", csv_path=str(csv_path))
+
+    trainer = copy.deepcopy(load_settings()["trainer"])
+    trainer.update(n_jobs=1, search=[
+        {"n_estimators": 10, "max_depth": 4, "min_samples_leaf": 5},
+        {"n_estimators": 10, "max_depth": 6, "min_samples_leaf": 5}
+    ])
+    return registry, storage, trainer
+
+
+def test_published_forest_serves_without_a_joblib_pool(setup):
+    registry, storage, trainer = setup
+    report = trainer_module.run_full(storage, trainer, StageTimer())
+
+    assert report["published"]
+    assert registry.load().model.n_jobs is None
+
+
+def test_no_new_rows_keeps_the_champion(setup):
+    registry, storage, trainer = setup
+    trainer_module.run_full(storage, trainer, StageTimer())
+    versions = registry.versions()
+
+    # Same data again: every holdout row was already learned by the champion
+    report = trainer_module.run_full(storage, trainer, StageTimer())
+    assert report["published"] is False
+    assert report["reason"] == "skipped: insufficient holdout"
+    assert registry.versions() == versions
+
+
+def test_rows_in_the_watermark_second_are_not_lost(setup):
+    registry, storage, trainer = setup
+    trainer_module.run_full(storage, trainer, StageTimer())
+    state = trainer_module.read_state()
+    watermark = state["watermark"]
+
+    # More rows land in the watermark's own second after the model was published
+    df = trainer_module.clean(trainer_module.load_transactions(storage))
+    late = df[df["timestamp"] == watermark].copy()
+    late["inventory_level"] = 7
+    combined = trainer_module.pd.concat([df, late], ignore_index=True)
+
+    new = trainer_module.after_watermark(combined, state)
+    assert len(new) == len(late)
+    assert (new["inventory_level"] == 7).all()
+
+    # Learning them moves the per-product counts on, so they are not picked up twice
+    _, rows = trainer_module.watermark_of(new, state)
+    state = dict(state, watermark_rows=rows)
+    assert trainer_module.after_watermark(combined, state).empty
+
+
+def test_incremental_reference_covers_the_history(setup):
+    registry, storage, trainer = setup
+    trainer_module.run_full(storage, trainer, StageTimer())
+    first = registry.metadata()["input_reference"]
+
+    more = generate_transactions(600, load_products(), seed=1)
+    more["timestamp"] = "2027-01-01 00:00:00"  # all after the watermark, one shared second
+    more.to_csv(storage["csv_path"], mode="a", header=False, index=False)
+
+    trainer = dict(trainer, mode="incremental", min_improvement=-1.0)  # always publish the update
+    report = trainer_module.run_incremental(storage, trainer, StageTimer())
+    assert report["published"]
+
+    metadata = registry.metadata()
+    for product, features in metadata["input_reference"].items():
+        before = sum(first[product]["inventory_level"]["counts"])
+        after = sum(features["inventory_level"]["counts"])
+        assert after > before  # old rows still counted, new ones added
+    # The update's holdout rows (same second) are still ahead of the watermark
+    pending = trainer_module.after_watermark(
+        trainer_module.clean(trainer_module.load_transactions(storage)), trainer_module.read_state()
+    )
+    assert 0 < len(pending) == len(trainer_module.clean(more)) - sum(metadata["watermark_rows"].values())